@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals
+
+        interval = getattr(settings, "TOKEN_SWEEP_INTERVAL_SECONDS", 0)
+        if interval:
+            from .sweepers import start_sweeper
+
+            start_sweeper(interval)
@@ -0,0 +1,287 @@
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError
+from django.conf import settings
+from django.http import JsonResponse, QueryDict, StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from .authentication import CachedJWTAuthentication
+from .events import stream_events, wait_for_events
+from .models import Colleague, ConfirmationCodeStatus, Order, PaymentInfo, ResetPassword
+from .serializers import (
+    AsyncCreateColleagueSerializer,
+    AsyncPaymentInfoSerializer,
+    OrderChangesQuerySerializer,
+    ResetPasswordSerializer,
+)
+from .throttling import IPRateThrottle, EmailRateThrottle
+from helpers.emails import registration_confirmation_email, reset_password_email
+from helpers.generators import generate_registration_code, generate_reset_password_token
+
+logger = logging.getLogger(__name__)
+
+
+async def send_email(email):
+    # SMTP is blocking, run it outside of the event loop
+    await sync_to_async(email.send, thread_sensitive=False)()
+
+
+class AsyncAPIView(View):
+    """
+    Base class of the async endpoints served through verbs/asgi.py.
+    Parses JSON or form bodies, authenticates with `authentication_classes`
+    and applies the same rate throttles as the DRF views.
+    """
+
+    authentication_classes = []
+    throttle_classes = []
+    throttle_scope = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # token based API, same as rest_framework.views.APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def parse_body(self, request) -> dict:
+        if request.content_type == "application/json":
+            try:
+                return json.loads(request.body or b"{}")
+            except json.JSONDecodeError:
+                return {}
+        return QueryDict(request.body).dict()
+
+    def authenticate(self, request):
+        return Request(
+            request,
+            authenticators=[auth() for auth in self.authentication_classes],
+            parser_context={"view": self},
+        ).user
+
+    def check_throttles(self, request):
+        wait_times = []
+        for throttle in [throttle() for throttle in self.throttle_classes]:
+            if not throttle.allow_request(request, self):
+                wait_times.append(throttle.wait())
+        return wait_times
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.data = self.parse_body(request)
+        wait_times = await sync_to_async(self.check_throttles, thread_sensitive=False)(
+            request
+        )
+        if wait_times:
+            wait = max([wait for wait in wait_times if wait is not None], default=None)
+            response = JsonResponse(
+                {"detail": "Request was throttled."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+            if wait is not None:
+                response["Retry-After"] = f"{int(wait) + 1}"
+            return response
+        if self.authentication_classes:
+            try:
+                request.user = await sync_to_async(self.authenticate)(request)
+            except exceptions.AuthenticationFailed as e:
+                return JsonResponse(
+                    {"detail": e.detail}, status=status.HTTP_401_UNAUTHORIZED
+                )
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncRegisterColleague(AsyncAPIView):
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+    throttle_scope = "register"
+
+    async def post(self, request, *args, **kwargs):
+        serializer = AsyncCreateColleagueSerializer(data=request.data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        validated_data = serializer.validated_data
+
+        email = Colleague.objects.normalize_email(validated_data["email"])
+        if await Colleague.objects.filter(email=email).aexists():
+            return JsonResponse(
+                {"email": ["Colleague with this email address already exists."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        confirmation_code = generate_registration_code()
+        # hashing is CPU bound, keep it off the event loop
+        password = await sync_to_async(make_password, thread_sensitive=False)(
+            validated_data["password"]
+        )
+        confirmation_code_status, _ = (
+            await ConfirmationCodeStatus.objects.aget_or_create(name="Valid")
+        )
+        colleague = Colleague(
+            email=email,
+            password=password,
+            first_name=validated_data.get("first_name"),
+            last_name=validated_data.get("last_name"),
+            confirmation_code=confirmation_code,
+            confirmation_code_status=confirmation_code_status,
+            is_account_confirmed=False,
+        )
+        try:
+            await colleague.asave()
+        except IntegrityError as e:
+            return JsonResponse(
+                [f"An error occured creating colleague account {e}"],
+                status=status.HTTP_400_BAD_REQUEST,
+                safe=False,
+            )
+
+        try:
+            await send_email(registration_confirmation_email(colleague, confirmation_code))
+        except Exception as email_error:
+            return JsonResponse(
+                [f"Account created but failed to send confirmation email: {email_error}"],
+                status=status.HTTP_400_BAD_REQUEST,
+                safe=False,
+            )
+        return JsonResponse(
+            AsyncCreateColleagueSerializer(colleague).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class AsyncResetPasswordView(AsyncAPIView):
+    throttle_classes = [IPRateThrottle, EmailRateThrottle]
+    throttle_scope = "reset_password"
+
+    async def post(self, request, *args, **kwargs):
+        serializer = ResetPasswordSerializer(data=request.data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        email = serializer.validated_data["email"]
+        if not await Colleague.objects.filter(email=email).aexists():
+            return JsonResponse(["Email not found"], status=400, safe=False)
+
+        token = generate_reset_password_token()
+        reset_password = await ResetPassword.objects.acreate(email=email, token=token)
+        try:
+            await send_email(reset_password_email(token))
+        except Exception as e:
+            logger.exception(f"Couldn't send reset password email: {e}")
+        return JsonResponse(
+            ResetPasswordSerializer(reset_password).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class AsyncOrderPayment(AsyncAPIView):
+    async def post(self, request, *args, **kwargs):
+        serializer = AsyncPaymentInfoSerializer(data=request.data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            order = await Order.objects.only("id").aget(
+                order_number=kwargs.get("order_number")
+            )
+        except Order.DoesNotExist:
+            return JsonResponse(
+                {"detail": "No Order matches the given query."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            payment = await PaymentInfo.objects.acreate(
+                order=order, **serializer.validated_data
+            )
+        except IntegrityError:
+            return JsonResponse(
+                {"transaction_id": ["Payment info with this transaction id already exists."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return JsonResponse(
+            AsyncPaymentInfoSerializer(payment).data, status=status.HTTP_201_CREATED
+        )
+
+
+class OrderChangeFeed(AsyncAPIView):
+    """
+    Order events after the `since` cursor, for one order (`order_number`) or,
+    for staff, every order. With `wait` the request is held open until the
+    first event arrives, without tying up a worker thread.
+    """
+
+    authentication_classes = [CachedJWTAuthentication]
+
+    async def get(self, request, *args, **kwargs):
+        query = OrderChangesQuerySerializer(data=request.GET)
+        if not query.is_valid():
+            return JsonResponse(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+        if not params.get("order_number") and not request.user.is_staff:
+            return JsonResponse(
+                {"detail": "Only staff can follow every order, pass order_number."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        events = await wait_for_events(
+            params["since"], params.get("order_number"), params["limit"], params["wait"]
+        )
+        return JsonResponse(
+            {
+                "events": events,
+                # pass back as `since` to continue after these events
+                "cursor": events[-1]["id"] if events else params["since"],
+            }
+        )
+
+
+class OrderEventStream(AsyncAPIView):
+    """
+    Server-sent events of one order, or of every order for the staff
+    dashboard. Served through verbs/asgi.py, an open stream is a coroutine
+    waiting on a queue of api.events.OrderEventHub. Browsers resume from
+    the Last-Event-ID header when they reconnect.
+    """
+
+    authentication_classes = [CachedJWTAuthentication]
+
+    def authenticate(self, request):
+        # EventSource can't send headers, accept the access token as a parameter
+        token = request.GET.get("access_token")
+        if token and "HTTP_AUTHORIZATION" not in request.META:
+            request.META["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        return super().authenticate(request)
+
+    async def get(self, request, order_number=None, *args, **kwargs):
+        if order_number is None and not request.user.is_staff:
+            return JsonResponse(
+                {"detail": "You do not have permission to perform this action."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        if order_number and not await Order.objects.filter(
+            order_number=order_number
+        ).aexists():
+            return JsonResponse(
+                {"detail": "No Order matches the given query."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        since = request.headers.get("Last-Event-ID") or request.GET.get("since")
+        if since is not None and not since.isdigit():
+            return JsonResponse(
+                {"since": ["A valid integer is required."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        response = StreamingHttpResponse(
+            stream_events(
+                int(since) if since is not None else None,
+                order_number,
+                settings.ORDER_EVENT_STREAM_MAX_SECONDS,
+            ),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # stop nginx from buffering the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
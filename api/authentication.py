@@ -0,0 +1,140 @@
+import threading
+import time
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .models import Colleague
+
+# Colleague columns kept in the per-process cache
+CACHED_COLLEAGUE_FIELDS = [
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_staff",
+    "is_employee",
+    "is_account_confirmed",
+]
+
+_colleague_cache = {}
+_colleague_cache_lock = threading.Lock()
+
+
+def get_cached_colleague(user_id) -> dict | None:
+    """
+    Return the cached column values of a colleague, loading them with a
+    single query when they are missing or older than the configured TTL.
+    """
+    key = str(user_id)
+    now = time.monotonic()
+    entry = _colleague_cache.get(key)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    row = (
+        Colleague.objects.filter(pk=user_id).values(*CACHED_COLLEAGUE_FIELDS).first()
+    )
+    if row is not None:
+        ttl = getattr(settings, "JWT_USER_CACHE_TTL_SECONDS", 60)
+        with _colleague_cache_lock:
+            _colleague_cache[key] = (now + ttl, row)
+    return row
+
+
+def invalidate_cached_colleague(user_id) -> None:
+    with _colleague_cache_lock:
+        _colleague_cache.pop(str(user_id), None)
+
+
+def clear_colleague_cache() -> None:
+    with _colleague_cache_lock:
+        _colleague_cache.clear()
+
+
+class TokenColleague(TokenUser):
+    """
+    Read-only stand-in for `Colleague` built from a verified token and the
+    cached colleague row. Views that need to save the user or assign it to a
+    foreign key must set `jwt_full_user = True`.
+    """
+
+    def __init__(self, token, row: dict):
+        super().__init__(token)
+        self.row = row
+
+    @cached_property
+    def id(self):
+        return self.row["id"]
+
+    @cached_property
+    def is_staff(self):
+        return self.row["is_staff"]
+
+    @property
+    def is_active(self):
+        return self.row["is_active"]
+
+    @property
+    def email(self):
+        return self.row["email"]
+
+    @property
+    def first_name(self):
+        return self.row["first_name"]
+
+    @property
+    def last_name(self):
+        return self.row["last_name"]
+
+    @property
+    def is_employee(self):
+        return self.row["is_employee"]
+
+    @property
+    def is_account_confirmed(self):
+        return self.row["is_account_confirmed"]
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}"
+
+    @cached_property
+    def username(self):
+        return self.email
+
+    def __str__(self) -> str:
+        return self.full_name
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user from a short-lived per-process
+    cache of colleague rows instead of querying the database on every
+    request. Views with `jwt_full_user = True` get a full `Colleague`.
+    """
+
+    def authenticate(self, request):
+        view = (request.parser_context or {}).get("view")
+        self.full_user = getattr(view, "jwt_full_user", False)
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.full_user or api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        row = get_cached_colleague(user_id)
+        if row is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not row["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return TokenColleague(validated_token, row)
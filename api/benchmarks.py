@@ -0,0 +1,274 @@
+import time
+import tracemalloc
+import uuid
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.test import RequestFactory
+from .models import Order, OrderPaymentStatus, OrderStatus, Product
+from .products import product_detail
+from .serializers import (
+    OrderListSerializer,
+    OrderSerializer,
+    ProductListSerializer,
+    ProductSerializer,
+)
+from helpers.generators import OrderNumberGenerator, generate_order_taxes
+
+
+class Rollback(Exception):
+    pass
+
+
+def serializer_context() -> dict:
+    # hyperlinked serializers need a request to build absolute urls
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+    return {"request": request}
+
+
+def bench_product_list_serializer(size: int):
+    products = Product.objects.all()[:size]
+    return lambda: ProductListSerializer(
+        products.all(), many=True, context=serializer_context()
+    ).data
+
+
+def bench_product_serializer(size: int):
+    products = Product.objects.all()[:size]
+    return lambda: ProductSerializer(
+        products.all(), many=True, context=serializer_context()
+    ).data
+
+
+def bench_product_detail_serializer(size: int):
+    """
+    `size` product detail reads through ProductSerializer, as the detail
+    view did before api.products.
+    """
+    pks = list(Product.objects.values_list("id", flat=True)[:size])
+    context = serializer_context()
+    return lambda: [
+        ProductSerializer(Product.objects.get(pk=pk), context=context).data
+        for pk in pks
+    ]
+
+
+def bench_product_detail_values(size: int):
+    pks = list(Product.objects.values_list("id", flat=True)[:size])
+    request = serializer_context()["request"]
+    return lambda: [product_detail(pk, request) for pk in pks]
+
+
+def bench_order_list_serializer(size: int):
+    orders = Order.objects.all()[:size]
+    return lambda: OrderListSerializer(
+        orders.all(), many=True, context=serializer_context()
+    ).data
+
+
+def bench_order_serializer_create(size: int):
+    """
+    Create one order with `size` items, rolled back after every run.
+    """
+    product_ids = list(
+        Product.objects.order_by("unit_price").values_list("id", flat=True)[:size]
+    )
+    data = {
+        "items": [{"id": str(product_id), "qty": 1} for product_id in product_ids],
+        "promo_code": {"code": ""},
+        "shipping_info": {"shipping_address": "1 Benchmark Street"},
+        "first_name": "Bench",
+        "last_name": "Mark",
+        "email": "benchmark@testdomain.com",
+    }
+
+    def run():
+        try:
+            with transaction.atomic():
+                serializer = OrderSerializer(data=data, context=serializer_context())
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+                raise Rollback
+        except Rollback:
+            pass
+
+    return run
+
+
+def bench_generate_order_taxes(size: int):
+    costs = [float(n) + 0.99 for n in range(size)]
+    return lambda: [generate_order_taxes(cost) for cost in costs]
+
+
+BENCHMARKS = {
+    "product_list_serializer": bench_product_list_serializer,
+    "product_serializer": bench_product_serializer,
+    "product_detail_serializer": bench_product_detail_serializer,
+    "product_detail_values": bench_product_detail_values,
+    "order_list_serializer": bench_order_list_serializer,
+    "order_serializer_create": bench_order_serializer_create,
+    "generate_order_taxes": bench_generate_order_taxes,
+}
+
+# largest size each benchmark supports, larger sizes are skipped
+SIZE_LIMITS = {
+    # order totals are stored with max_digits=6, more items overflow them
+    "order_serializer_create": 100,
+}
+
+
+def measure(func, repeat: int) -> dict:
+    """
+    Best wall time over `repeat` runs, the least noisy estimate, then one run each
+    for the query count and the tracemalloc peak.
+    """
+    func()  # warm up caches and lazy imports
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    queries = []
+    # counts every query, unlike connection.queries which is capped
+    with connection.execute_wrapper(
+        lambda execute, sql, params, many, context: queries.append(sql)
+        or execute(sql, params, many, context)
+    ):
+        func()
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_ms": min(timings) * 1000,
+        "queries": len(queries),
+        "peak_kib": peak / 1024,
+    }
+
+
+def run_benchmarks(names: list, sizes: list, repeat: int = 5) -> dict:
+    results = {}
+    for name in names:
+        results[name] = {}
+        for size in sizes:
+            if size > SIZE_LIMITS.get(name, size):
+                continue
+            results[name][str(size)] = measure(BENCHMARKS[name](size), repeat)
+    return results
+
+
+# growth below these is treated as noise whatever the threshold
+NOISE_FLOOR = {"wall_ms": 0.5, "peak_kib": 16}
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare results with a saved baseline. Wall time and allocations regress
+    when they grow by more than `threshold` (0.2 is 20%) and the noise floor,
+    query counts on any increase.
+    """
+    regressions = []
+    for name, sizes in results.items():
+        for size, current in sizes.items():
+            previous = baseline.get(name, {}).get(size)
+            if not previous:
+                continue
+            for metric, noise_floor in NOISE_FLOOR.items():
+                growth = current[metric] - previous[metric]
+                if growth > noise_floor and growth > previous[metric] * threshold:
+                    regressions.append(
+                        f"{name}[{size}] {metric}: "
+                        f"{previous[metric]:.1f} -> {current[metric]:.1f}"
+                    )
+            if current["queries"] > previous["queries"]:
+                regressions.append(
+                    f"{name}[{size}] queries: "
+                    f"{previous['queries']} -> {current['queries']}"
+                )
+    return regressions
+
+
+# order number schemes to compare, each a factory of a number generator
+ORDER_NUMBER_SCHEMES = {
+    # what helpers.generators.generate_order_number did before
+    "uuid4_tail": lambda: lambda: str(uuid.uuid4()).split("-")[-1],
+    "time_ordered": lambda: OrderNumberGenerator(0),
+}
+
+
+def order_number_index_size_kib() -> float:
+    """
+    Size of the unique index on Order.order_number, on SQLite (which needs
+    the dbstat table) and PostgreSQL.
+    """
+    table = Order._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            names = [
+                name
+                for name, constraint in connection.introspection.get_constraints(
+                    cursor, table
+                ).items()
+                if constraint["columns"] == ["order_number"]
+            ]
+            cursor.execute(
+                "SELECT SUM(pg_relation_size(name::regclass)) FROM unnest(%s) AS name",
+                [names],
+            )
+        else:
+            cursor.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name IN ("
+                " SELECT il.name FROM pragma_index_list(%s) il,"
+                " pragma_index_info(il.name) ii WHERE ii.name = 'order_number')",
+                [table],
+            )
+        return (cursor.fetchone()[0] or 0) / 1024
+
+
+def bench_order_number_inserts(scheme: str, count: int, batch_size: int = 1000) -> dict:
+    """
+    Bulk insert `count` orders numbered by `scheme` into the order table,
+    rolled back afterwards. Returns the insert rate and the size the
+    order_number index grew to.
+    """
+    generate = ORDER_NUMBER_SCHEMES[scheme]()
+    status = OrderStatus.objects.get_or_create(name="In Queue")[0]
+    payment_status = OrderPaymentStatus.objects.get_or_create(name="Default Status")[0]
+    result = {}
+    try:
+        with transaction.atomic():
+            index_kib = order_number_index_size_kib()
+            started = time.perf_counter()
+            for start in range(0, count, batch_size):
+                Order.objects.bulk_create(
+                    [
+                        Order(
+                            order_number=generate(),
+                            status=status,
+                            payment_status=payment_status,
+                            shipping_cost=0,
+                        )
+                        for _ in range(min(batch_size, count - start))
+                    ]
+                )
+            elapsed = time.perf_counter() - started
+            result = {
+                "orders_per_s": count / elapsed,
+                "index_kib": order_number_index_size_kib() - index_kib,
+            }
+            raise Rollback
+    except Rollback:
+        pass
+    return result
+
+
+def compare_order_number_schemes(count: int, batch_size: int = 1000) -> dict:
+    return {
+        scheme: bench_order_number_inserts(scheme, count, batch_size)
+        for scheme in ORDER_NUMBER_SCHEMES
+    }
@@ -0,0 +1,266 @@
+import asyncio
+import json
+import time
+import weakref
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.utils import timezone
+from .models import Order, OrderEvent, PaymentInfo
+from helpers.defaults import (
+    ORDER_EVENT_DB_POLL_SECONDS,
+    ORDER_EVENT_PAGE_SIZE,
+    ORDER_EVENT_POLL_SECONDS,
+    ORDER_EVENT_SETTLE_SECONDS,
+    ORDER_EVENT_STREAM_HEARTBEAT_SECONDS,
+    ORDER_EVENT_STREAM_RETRY_MILLISECONDS,
+)
+
+# id of the newest event, lets waiting clients skip the database until it moves
+LATEST_ORDER_EVENT_KEY = "order_events:latest"
+
+ORDER_EVENT_FIELDS = [
+    "id",
+    "order_number",
+    "event",
+    "status",
+    "payment_status",
+    "amount_paid",
+    "created_at",
+]
+
+
+def track_order_statuses(order: Order):
+    """
+    Remember the statuses an order was loaded with, so a save can tell
+    whether they changed without querying the old row. Deferred columns
+    are skipped instead of being loaded.
+    """
+    order._tracked_statuses = (
+        order.__dict__.get("status_id"),
+        order.__dict__.get("payment_status_id"),
+    )
+
+
+def record_order_event(order: Order, event: str, **fields) -> OrderEvent:
+    order_event = OrderEvent.objects.create(
+        order=order,
+        order_number=order.order_number,
+        event=event,
+        status=order.status.name,
+        payment_status=order.payment_status.name,
+        **fields,
+    )
+    cache.set(LATEST_ORDER_EVENT_KEY, order_event.id, None)
+    return order_event
+
+
+def order_saved_events(order: Order, created: bool) -> list:
+    """
+    Events describing a save of `order`, compared with its tracked statuses.
+    """
+    if created:
+        return ["created"]
+    status_id, payment_status_id = getattr(order, "_tracked_statuses", (None, None))
+    events = []
+    if status_id is not None and status_id != order.status_id:
+        events.append("status_changed")
+    if payment_status_id is not None and payment_status_id != order.payment_status_id:
+        events.append("payment_status_changed")
+    return events
+
+
+def record_payment_event(payment: PaymentInfo) -> OrderEvent:
+    return record_order_event(
+        payment.order, "payment_received", amount_paid=payment.amount_paid
+    )
+
+
+def events_after(since: int, order_number: str | None = None, limit: int = 100):
+    """
+    Events after the `since` cursor, leaving out those younger than
+    ORDER_EVENT_SETTLE_SECONDS. A lower id still being committed by a
+    concurrent transaction is visible by then, so no reader moves its
+    cursor past it.
+    """
+    settled = timezone.now() - timedelta(seconds=ORDER_EVENT_SETTLE_SECONDS)
+    events = OrderEvent.objects.filter(id__gt=since, created_at__lte=settled)
+    if order_number:
+        events = events.filter(order_number=order_number)
+    return events.order_by("id").values(*ORDER_EVENT_FIELDS)[:limit]
+
+
+async def wait_for_events(
+    since: int, order_number: str | None = None, limit: int = 100, timeout: float = 0
+) -> list:
+    """
+    Events after the `since` cursor, waiting up to `timeout` seconds for the
+    first one. While waiting only the cached newest event id is polled; the
+    database is read when it moves past what was already checked, or every
+    ORDER_EVENT_DB_POLL_SECONDS in case the cache is not shared by the
+    process that wrote the event.
+    """
+    deadline = time.monotonic() + timeout
+    checked = since
+    next_query = 0
+    while True:
+        latest = await cache.aget(LATEST_ORDER_EVENT_KEY)
+        now = time.monotonic()
+        if (latest is not None and latest > checked) or now >= next_query:
+            events = [row async for row in events_after(since, order_number, limit)]
+            if events or now >= deadline:
+                return events
+            # a new event that is still settling is read again once it has
+            settling = latest is not None and latest > checked
+            checked = max(checked, latest or 0)
+            next_query = now + (
+                ORDER_EVENT_SETTLE_SECONDS if settling else ORDER_EVENT_DB_POLL_SECONDS
+            )
+        if now >= deadline:
+            return []
+        await asyncio.sleep(min(ORDER_EVENT_POLL_SECONDS, deadline - now))
+
+
+async def latest_event_id() -> int:
+    return (await OrderEvent.objects.aaggregate(latest=Max("id")))["latest"] or 0
+
+
+class OrderEventHub:
+    """
+    Fans the order events out to every open stream of one event loop.
+    A single task polls for new events, the same way wait_for_events does,
+    and pushes each one onto the queues of the matching subscribers, so an
+    open stream costs a queue rather than its own database polling.
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.cursor = 0
+        self.task = None
+        self.started = None
+
+    async def subscribe(self, order_number: str | None = None) -> asyncio.Queue:
+        """
+        Queue receiving the events of `order_number` (every order when None)
+        with ids above self.cursor once the call returns.
+        """
+        if self.task is None:
+            # set before anything is awaited, so that subscribers arriving
+            # meanwhile wait for the same task instead of starting their own
+            self.started = asyncio.get_running_loop().create_future()
+            self.task = asyncio.create_task(self.run(self.started))
+        queue = asyncio.Queue()
+        self.subscribers[queue] = order_number
+        try:
+            # until the task has read the cursor
+            await asyncio.shield(self.started)
+        except BaseException:
+            self.unsubscribe(queue)
+            raise
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.pop(queue, None)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            # the next subscriber starts a new task instead of joining this one
+            self.task = None
+
+    def publish(self, events: list):
+        for event in events:
+            self.cursor = event["id"]
+            for queue, order_number in list(self.subscribers.items()):
+                if order_number in (None, event["order_number"]):
+                    queue.put_nowait(event)
+
+    async def run(self, started: asyncio.Future):
+        try:
+            try:
+                self.cursor = await latest_event_id()
+            except asyncio.CancelledError:
+                started.cancel()
+                raise
+            except Exception as e:
+                started.set_exception(e)
+                raise
+            started.set_result(None)
+            checked, next_query = self.cursor, 0
+            while self.subscribers:
+                latest = await cache.aget(LATEST_ORDER_EVENT_KEY)
+                now = time.monotonic()
+                if (latest is not None and latest > checked) or now >= next_query:
+                    events = [
+                        row
+                        async for row in events_after(
+                            self.cursor, limit=ORDER_EVENT_PAGE_SIZE
+                        )
+                    ]
+                    self.publish(events)
+                    settling = latest is not None and latest > self.cursor
+                    checked = max(self.cursor, latest or 0)
+                    next_query = now + (
+                        ORDER_EVENT_SETTLE_SECONDS
+                        if settling
+                        else ORDER_EVENT_DB_POLL_SECONDS
+                    )
+                    if len(events) == ORDER_EVENT_PAGE_SIZE:
+                        continue  # more are waiting
+                await asyncio.sleep(ORDER_EVENT_POLL_SECONDS)
+        finally:
+            if self.task is asyncio.current_task():
+                self.task = None
+
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_event_hub() -> OrderEventHub:
+    # asyncio queues and tasks belong to the loop they were created in
+    loop = asyncio.get_running_loop()
+    if loop not in _hubs:
+        _hubs[loop] = OrderEventHub()
+    return _hubs[loop]
+
+
+def format_event(event: dict) -> str:
+    data = json.dumps(event, cls=DjangoJSONEncoder)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+async def stream_events(
+    since: int | None, order_number: str | None = None, max_seconds: float = 300
+):
+    """
+    Server-sent events for the events after `since` (only new ones when
+    None), ending after `max_seconds`. Comments are sent as heartbeats while
+    nothing happens so proxies keep the connection open.
+    """
+    deadline = time.monotonic() + max_seconds
+    hub = get_event_hub()
+    queue = await hub.subscribe(order_number)
+    try:
+        yield f"retry: {ORDER_EVENT_STREAM_RETRY_MILLISECONDS}\n\n"
+        cursor = hub.cursor if since is None else since
+        # replay what was missed, the queue holds everything after hub.cursor
+        while cursor < hub.cursor:
+            missed = [row async for row in events_after(cursor, order_number)]
+            for event in missed:
+                cursor = event["id"]
+                yield format_event(event)
+            if len(missed) < ORDER_EVENT_PAGE_SIZE:
+                break
+
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), min(ORDER_EVENT_STREAM_HEARTBEAT_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event["id"] > cursor:
+                cursor = event["id"]
+                yield format_event(event)
+    finally:
+        hub.unsubscribe(queue)
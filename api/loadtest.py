@@ -0,0 +1,205 @@
+import random
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.test import Client
+from helpers.benchmarking import summarize_latencies
+
+
+class InProcessDriver:
+    """
+    Sends requests through Django's WSGI handler without a server.
+    """
+
+    def __init__(self):
+        self.client = Client(raise_request_exception=False)
+
+    def request(self, method: str, path: str, data: dict | None = None):
+        if method == "GET":
+            response = self.client.get(path, data)
+        else:
+            response = self.client.post(path, data, content_type="application/json")
+        body = response.json() if response.get("Content-Type") == "application/json" else None
+        return response.status_code, body
+
+
+class HTTPDriver:
+    """
+    Sends requests to a running server, e.g. `manage.py runserver` or uvicorn.
+    """
+
+    def __init__(self, base_url: str):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def request(self, method: str, path: str, data: dict | None = None):
+        url = f"{self.base_url}{path}"
+        if method == "GET":
+            response = self.session.get(url, params=data)
+        else:
+            response = self.session.post(url, json=data)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+
+class VirtualUser:
+    """
+    Runs scenarios against a driver and records the latency of every request.
+    """
+
+    def __init__(self, driver, rng: random.Random):
+        self.driver = driver
+        self.rng = rng
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.products = []
+        self.order_numbers = []
+        self.last_order_cost = None
+
+    def call(self, endpoint: str, method: str, path: str, data: dict | None = None):
+        started = time.perf_counter()
+        status_code, body = self.driver.request(method, path, data)
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        if status_code >= 400:
+            self.errors[endpoint] += 1
+        return status_code, body
+
+    def product(self) -> dict:
+        if not self.products:
+            browse(self)
+        return self.rng.choice(self.products)
+
+
+def browse(user: VirtualUser):
+    status_code, body = user.call("product-list", "GET", "/api/products/")
+    if status_code == 200 and body:
+        user.products = body["results"]
+
+
+def filter_products(user: VirtualUser):
+    product = user.product()
+    low = user.rng.randint(0, 100)
+    user.call(
+        "product-list-filtered",
+        "GET",
+        "/api/products/",
+        {
+            "grade__name": product["grade"],
+            "unit_price_min": low,
+            "unit_price_max": low + user.rng.randint(20, 150),
+        },
+    )
+
+
+def view_detail(user: VirtualUser):
+    product = user.product()
+    user.call("product-detail", "GET", f"/api/products/{product['id']}/")
+
+
+def checkout(user: VirtualUser):
+    items = {}
+    for _ in range(user.rng.randint(1, 3)):
+        items[user.product()["id"]] = user.rng.randint(1, 3)
+    status_code, body = user.call(
+        "order-create",
+        "POST",
+        "/api/orders/add/",
+        {
+            "items": [{"id": product_id, "qty": qty} for product_id, qty in items.items()],
+            "promo_code": {"code": ""},
+            "shipping_info": {"shipping_address": "1 Load Test Street"},
+            "first_name": "Load",
+            "last_name": "Tester",
+            "email": "loadtester@testdomain.com",
+        },
+    )
+    if status_code == 201 and body:
+        user.order_numbers.append(body["order_number"])
+        user.last_order_cost = body["total_order_cost"]
+
+
+def pay(user: VirtualUser):
+    if not user.order_numbers:
+        checkout(user)
+    if not user.order_numbers:
+        return
+    order_number = user.order_numbers.pop()
+    user.call(
+        "order-payment",
+        "POST",
+        f"/api/orders/{order_number}/pay/",
+        {
+            "amount_paid": user.last_order_cost,
+            "transaction_id": f"load-{uuid.UUID(int=user.rng.getrandbits(128)).hex}",
+        },
+    )
+
+
+SCENARIOS = {
+    "browse": browse,
+    "filter": filter_products,
+    "detail": view_detail,
+    "checkout": checkout,
+    "pay": pay,
+}
+
+
+def run_load(
+    driver_factory,
+    scenarios: list,
+    users: int = 1,
+    iterations: int = 10,
+    seed: int = 42,
+) -> dict:
+    """
+    Run every scenario in order `iterations` times for each of `users`
+    concurrent virtual users and report latency and throughput per endpoint.
+    """
+
+    def run_user(index: int) -> VirtualUser:
+        user = VirtualUser(driver_factory(), random.Random(seed + index))
+        for _ in range(iterations):
+            for scenario in scenarios:
+                SCENARIOS[scenario](user)
+        return user
+
+    started = time.perf_counter()
+    if users == 1:
+        # stay on the calling thread and its database connection
+        virtual_users = [run_user(0)]
+    else:
+        with ThreadPoolExecutor(users) as executor:
+            virtual_users = list(executor.map(run_user, range(users)))
+    elapsed = time.perf_counter() - started
+
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for user in virtual_users:
+        for endpoint, values in user.latencies.items():
+            latencies[endpoint].extend(values)
+        for endpoint, count in user.errors.items():
+            errors[endpoint] += count
+
+    endpoints = {}
+    for endpoint, values in latencies.items():
+        endpoints[endpoint] = summarize_latencies(values, elapsed)
+        endpoints[endpoint]["errors"] = errors[endpoint]
+    all_latencies = [value for values in latencies.values() for value in values]
+    total = summarize_latencies(all_latencies, elapsed)
+    total["errors"] = sum(errors.values())
+    return {
+        "config": {
+            "scenarios": scenarios,
+            "users": users,
+            "iterations": iterations,
+            "seed": seed,
+        },
+        "elapsed_s": elapsed,
+        "endpoints": endpoints,
+        "total": total,
+    }
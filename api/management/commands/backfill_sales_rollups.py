@@ -0,0 +1,36 @@
+import datetime
+from django.core.management.base import BaseCommand
+from api.rollups import rebuild_rollups, rebuild_sales_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily sales rollups and the product sales counts "
+        "from the raw orders and payments"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            type=datetime.date.fromisoformat,
+            default=None,
+            help="First day to recompute (YYYY-MM-DD), defaults to the first order",
+        )
+        parser.add_argument(
+            "--end",
+            type=datetime.date.fromisoformat,
+            default=None,
+            help="Last day to recompute (YYYY-MM-DD), defaults to the last order",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups(options["start"], options["end"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Rebuilt "
+                + ", ".join(f"{count} {table} rows" for table, count in written.items())
+            )
+        )
+        # the counts are not per day, they are always recounted in full
+        counted = rebuild_sales_counts()
+        self.stdout.write(self.style.SUCCESS(f"Recounted sales of {counted} products"))
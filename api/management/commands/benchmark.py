@@ -0,0 +1,77 @@
+import contextlib
+import io
+import json
+from django.core.management.base import BaseCommand, CommandError
+from api.benchmarks import BENCHMARKS, find_regressions, run_benchmarks
+from api.seeding import seed_load_fixtures
+from helpers.benchmarking import isolated_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the serializer and pricing hot paths against seeded fixtures, "
+        "save baselines and flag regressions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "benchmarks",
+            nargs="*",
+            help="Benchmarks to run, defaults to all of them",
+        )
+        parser.add_argument(
+            "--sizes",
+            default="10,100,1000",
+            help="Comma separated fixture sizes",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--save-baseline", help="Write the results to this file")
+        parser.add_argument("--baseline", help="Compare the results with this file")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed relative growth of wall time and allocations",
+        )
+
+    def handle(self, *args, **options):
+        names = options["benchmarks"] or list(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        sizes = [int(size) for size in options["sizes"].split(",")]
+
+        # the serializers print debugging output, keep it out of the report
+        with isolated_database(), contextlib.redirect_stdout(io.StringIO()):
+            seed_load_fixtures(
+                products=max(sizes),
+                colleagues=10,
+                orders=max(sizes),
+                seed=options["seed"],
+            )
+            results = run_benchmarks(names, sizes, options["repeat"])
+
+        self.stdout.write(
+            f"{'benchmark':<28}{'size':>6}{'wall ms':>10}{'queries':>9}{'peak KiB':>10}"
+        )
+        for name, by_size in results.items():
+            for size, result in by_size.items():
+                self.stdout.write(
+                    f"{name:<28}{size:>6}{result['wall_ms']:>10.2f}"
+                    f"{result['queries']:>9}{result['peak_kib']:>10.1f}"
+                )
+
+        if options["save_baseline"]:
+            with open(options["save_baseline"], "w") as output:
+                json.dump(results, output, indent=2)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)
+            regressions = find_regressions(results, baseline, options["threshold"])
+            if regressions:
+                raise CommandError(
+                    "Regressions above threshold:\n" + "\n".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+DJANGO_DEFAULT_HASHERS = {
+    "django-pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django-scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+    "django-argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+}
+
+BENCHMARK_PASSWORD = "correct horse battery staple"
+
+
+def setup_worker():
+    # spawned workers (macOS, Windows) start without configured settings
+    if not settings.configured:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "verbs.settings")
+        django.setup()
+
+
+def count_hashes(hasher_path: str, duration: float) -> int:
+    """
+    Hash passwords with the given hasher for `duration` seconds
+    and return how many hashes were computed.
+    """
+    hasher = import_string(hasher_path)()
+    count = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        hasher.encode(BENCHMARK_PASSWORD, hasher.salt())
+        count += 1
+    return count
+
+
+class Command(BaseCommand):
+    help = "Report password hashes per second per core for each hashing candidate"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=2.0,
+            help="Seconds spent hashing per candidate and process",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of processes hashing in parallel",
+        )
+        parser.add_argument(
+            "candidates",
+            nargs="*",
+            help="Candidates to run, defaults to every settings profile "
+            "and Django's default hashers",
+        )
+
+    def get_candidates(self) -> dict:
+        candidates = {
+            f"profile-{name}": path
+            for name, path in settings.PASSWORD_HASHING_PROFILES.items()
+        }
+        candidates.update(DJANGO_DEFAULT_HASHERS)
+        return candidates
+
+    def handle(self, *args, **options):
+        duration = options["duration"]
+        processes = options["processes"]
+        candidates = self.get_candidates()
+        selected = options["candidates"] or list(candidates)
+
+        self.stdout.write(
+            f"{'candidate':<20}{'hashes/s/core':>15}{'ms/hash':>10}{'hashes/s':>12}"
+        )
+        with ProcessPoolExecutor(processes, initializer=setup_worker) as executor:
+            for name in selected:
+                if name not in candidates:
+                    self.stderr.write(f"Unknown candidate {name}")
+                    continue
+                hasher = import_string(candidates[name])()
+                if hasher.library:
+                    try:
+                        # skip candidates whose library is not installed
+                        hasher._load_library()
+                    except ValueError as e:
+                        self.stderr.write(f"Skipping {name}: {e}")
+                        continue
+
+                counts = executor.map(
+                    count_hashes, [candidates[name]] * processes, [duration] * processes
+                )
+                total = sum(counts) / duration
+                per_core = total / processes
+                self.stdout.write(
+                    f"{name:<20}{per_core:>15.1f}{1000 / per_core:>10.1f}{total:>12.1f}"
+                )
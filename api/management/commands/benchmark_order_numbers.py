@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from api.benchmarks import compare_order_number_schemes
+from helpers.benchmarking import isolated_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the insert rate and order_number index size of the order "
+        "number schemes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=100000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            results = compare_order_number_schemes(
+                options["count"], options["batch_size"]
+            )
+
+        self.stdout.write(f"{'scheme':<16}{'orders/s':>12}{'index KiB':>12}")
+        for scheme, result in results.items():
+            self.stdout.write(
+                f"{scheme:<16}{result['orders_per_s']:>12.0f}"
+                f"{result['index_kib']:>12.1f}"
+            )
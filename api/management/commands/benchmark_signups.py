@@ -0,0 +1,104 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from helpers.benchmarking import isolated_database, summarize_latencies
+
+
+def signup_payload() -> dict:
+    return {
+        "email": f"bench-{uuid.uuid4().hex}@testdomain.com",
+        "password": "benchmark-password",
+        "first_name": "Bench",
+        "last_name": "Mark",
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare signups handled by one WSGI worker (sync view) with one ASGI "
+        "worker (async view), in-process against a temporary database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Threads of the WSGI worker",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Signups in flight on the ASGI worker",
+        )
+        parser.add_argument(
+            "--smtp-latency",
+            type=float,
+            default=0.05,
+            help="Simulated seconds spent sending each confirmation email",
+        )
+
+    def run_wsgi(self, requests: int, threads: int) -> dict:
+        url = reverse("register")
+
+        def signup(_):
+            client = Client()
+            started = time.perf_counter()
+            response = client.post(url, signup_payload(), content_type="application/json")
+            assert response.status_code == 201, response.content
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            latencies = list(executor.map(signup, range(requests)))
+        return summarize_latencies(latencies, time.perf_counter() - started)
+
+    async def run_asgi(self, requests: int, concurrency: int) -> dict:
+        url = reverse("async-register")
+        client = AsyncClient()
+        in_flight = asyncio.Semaphore(concurrency)
+
+        async def signup():
+            async with in_flight:
+                started = time.perf_counter()
+                response = await client.post(
+                    url, signup_payload(), content_type="application/json"
+                )
+                assert response.status_code == 201, response.content
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*[signup() for _ in range(requests)])
+        return summarize_latencies(latencies, time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        rest_framework = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}
+        with isolated_database(), override_settings(
+            EMAIL_BACKEND="helpers.benchmarking.LatencyEmailBackend",
+            EMAIL_LATENCY_SECONDS=options["smtp_latency"],
+            REST_FRAMEWORK=rest_framework,
+        ):
+            results = {
+                f"wsgi (threads={options['threads']})": self.run_wsgi(
+                    options["requests"], options["threads"]
+                ),
+                f"asgi (concurrency={options['concurrency']})": asyncio.run(
+                    self.run_asgi(options["requests"], options["concurrency"])
+                ),
+            }
+
+        self.stdout.write(
+            f"{'worker':<28}{'signups/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<28}{result['throughput']:>10.1f}{result['p50_ms']:>10.1f}"
+                f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+            )
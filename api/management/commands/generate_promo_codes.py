@@ -0,0 +1,72 @@
+import csv
+import datetime
+import sys
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from api.promo_codes import create_promo_codes
+from helpers.defaults import PROMO_CODE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Create single-use (or limited) promo codes for a campaign in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("campaign", help="Campaign name, also the code prefix")
+        parser.add_argument("--count", type=int, required=True)
+        parser.add_argument("--value", type=Decimal, default=Decimal("0.00"))
+        parser.add_argument("--value-percentage", type=Decimal, default=Decimal("0.0"))
+        parser.add_argument(
+            "--max-uses",
+            type=int,
+            default=1,
+            help="Uses allowed per code, 0 for unlimited",
+        )
+        parser.add_argument(
+            "--expires-at",
+            type=datetime.datetime.fromisoformat,
+            default=None,
+            help="ISO 8601 date and time the codes stop working",
+        )
+        parser.add_argument("--batch-size", type=int, default=PROMO_CODE_BATCH_SIZE)
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="CSV file the codes are written to, - for stdout",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        output = None
+        if options["output"] == "-":
+            output = sys.stdout
+        elif options["output"]:
+            output = open(options["output"], "w", newline="")
+        writer = csv.writer(output) if output else None
+
+        created = 0
+        try:
+            for chunk in create_promo_codes(
+                options["campaign"],
+                options["count"],
+                batch_size=options["batch_size"],
+                value=options["value"],
+                value_percentage=options["value_percentage"],
+                max_uses=options["max_uses"] or None,
+                expires_at=options["expires_at"],
+            ):
+                created += len(chunk)
+                if writer:
+                    writer.writerows([code] for code in chunk)
+        except ValueError as e:
+            raise CommandError(e)
+        finally:
+            if output and output is not sys.stdout:
+                output.close()
+
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Created {created} promo codes for {options['campaign']} "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,90 @@
+import contextlib
+import io
+import json
+from django.core.management.base import BaseCommand, CommandError
+from api.loadtest import SCENARIOS, HTTPDriver, InProcessDriver, run_load
+from api.seeding import seed_load_fixtures
+from helpers.benchmarking import isolated_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a catalog, colleagues and orders, then replay browse, filter, "
+        "detail, checkout and pay scenarios and report latency per endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=200)
+        parser.add_argument("--colleagues", type=int, default=50)
+        parser.add_argument("--orders", type=int, default=500)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--scenarios",
+            default=",".join(SCENARIOS),
+            help="Comma separated scenarios each virtual user runs in order",
+        )
+        parser.add_argument(
+            "--users", type=int, default=1, help="Concurrent virtual users"
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=10,
+            help="Times each virtual user runs the scenarios",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Drive a running server over HTTP instead of in-process. "
+            "Its data is used as is unless --seed-database is given",
+        )
+        parser.add_argument(
+            "--seed-database",
+            action="store_true",
+            help="With --base-url, seed the configured database first",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        scenarios = options["scenarios"].split(",")
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        def seed():
+            return seed_load_fixtures(
+                options["products"],
+                options["colleagues"],
+                options["orders"],
+                options["seed"],
+            )
+
+        load_options = {
+            "scenarios": scenarios,
+            "users": options["users"],
+            "iterations": options["iterations"],
+            "seed": options["seed"],
+        }
+        if options["base_url"]:
+            seeded = seed() if options["seed_database"] else {}
+            report = run_load(lambda: HTTPDriver(options["base_url"]), **load_options)
+        else:
+            # the in-process views print debugging output, keep it out of the report
+            with isolated_database(), contextlib.redirect_stdout(io.StringIO()):
+                seeded = seed()
+                report = run_load(InProcessDriver, **load_options)
+        report["seeded"] = seeded
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+
+        self.stdout.write(
+            f"{'endpoint':<24}{'requests':>10}{'errors':>8}{'req/s':>10}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        )
+        for endpoint, result in [*report["endpoints"].items(), ("total", report["total"])]:
+            self.stdout.write(
+                f"{endpoint:<24}{result['requests']:>10}{result['errors']:>8}"
+                f"{result['throughput']:>10.1f}{result['p50_ms']:>10.1f}"
+                f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+            )
@@ -0,0 +1,139 @@
+import os
+import random
+import time
+from multiprocessing import Pool
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from api.models import Colleague, Product
+from api.seeding import (
+    SEED_PASSWORD,
+    build_colleagues,
+    build_product_links,
+    build_products,
+    load_order_dependencies,
+    seed_lookups,
+    seed_order_chunk,
+)
+
+_dependencies = None
+
+
+def tune_connection():
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            # wait for the other writers instead of failing with "database is locked"
+            cursor.execute("PRAGMA busy_timeout = 600000")
+            if not connection.in_atomic_block:
+                # seeding can be redone, skip fsync on commit
+                cursor.execute("PRAGMA synchronous = OFF")
+
+
+def init_worker():
+    global _dependencies
+    tune_connection()
+    _dependencies = load_order_dependencies()
+
+
+def run_chunk(args):
+    seed, start, count, batch_size = args
+    return seed_order_chunk(seed, start, count, _dependencies, batch_size)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate products, colleagues, orders, order items and payments "
+        "at production scale with chunked bulk inserts across processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10_000)
+        parser.add_argument("--colleagues", type=int, default=100_000)
+        parser.add_argument("--orders", type=int, default=1_000_000)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes building and inserting order chunks",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10_000,
+            help="Orders built and committed per transaction",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2_000,
+            help="Rows per INSERT statement",
+        )
+
+    def seed_catalog(self, options):
+        rng = random.Random(options["seed"])
+        chunk_size, batch_size = options["chunk_size"], options["batch_size"]
+        password = make_password(SEED_PASSWORD)
+        with transaction.atomic():
+            lookups = seed_lookups()
+            for start in range(0, options["products"], chunk_size):
+                count = min(chunk_size, options["products"] - start)
+                products = build_products(rng, count, lookups, start)
+                Product.objects.bulk_create(products, batch_size=batch_size)
+                for field, rows in build_product_links(rng, products, lookups).items():
+                    getattr(Product, field).through.objects.bulk_create(
+                        rows, batch_size=batch_size
+                    )
+            for start in range(0, options["colleagues"], chunk_size):
+                count = min(chunk_size, options["colleagues"] - start)
+                colleagues = build_colleagues(
+                    rng, count, f"seed{options['seed']}", start, password
+                )
+                Colleague.objects.bulk_create(colleagues, batch_size=batch_size)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        tune_connection()
+        self.seed_catalog(options)
+        self.stdout.write(
+            f"Created {options['products']} products and {options['colleagues']} "
+            f"colleagues in {time.perf_counter() - started:.1f}s"
+        )
+
+        chunks = [
+            (
+                options["seed"],
+                start,
+                min(options["chunk_size"], options["orders"] - start),
+                options["batch_size"],
+            )
+            for start in range(0, options["orders"], options["chunk_size"])
+        ]
+        totals = {"orders": 0, "order_items": 0, "payments": 0}
+
+        def report(result):
+            for key, value in result.items():
+                totals[key] += value
+            self.stdout.write(
+                f"  {totals['orders']}/{options['orders']} orders "
+                f"({time.perf_counter() - started:.1f}s)"
+            )
+
+        if options["processes"] > 1:
+            # forked workers must open their own connections
+            connections.close_all()
+            with Pool(options["processes"], initializer=init_worker) as pool:
+                for result in pool.imap_unordered(run_chunk, chunks):
+                    report(result)
+        else:
+            dependencies = load_order_dependencies()
+            for seed, start, count, batch_size in chunks:
+                report(seed_order_chunk(seed, start, count, dependencies, batch_size))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {totals['orders']} orders, {totals['order_items']} order "
+                f"items and {totals['payments']} payments in "
+                f"{time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from api.sweepers import sweep_expired_tokens
+from helpers.defaults import TOKEN_SWEEP_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Delete stale reset password tokens and clear used confirmation codes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=TOKEN_SWEEP_BATCH_SIZE,
+            help="Number of rows deleted or updated per query",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Stop after this many batches per table",
+        )
+
+    def handle(self, *args, **options):
+        result = sweep_expired_tokens(options["batch_size"], options["max_batches"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {result['reset_password_tokens']} reset password tokens, "
+                f"cleared {result['confirmation_codes']} confirmation codes."
+            )
+        )
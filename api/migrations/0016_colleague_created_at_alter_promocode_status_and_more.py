@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-19 16:44
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_alter_promocode_status_alter_resetpassword_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='colleague',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='promocode',
+            name='status',
+            field=models.CharField(choices=[('invalid', 'Invalid'), ('valid', 'Valid')], default='invalid', max_length=7),
+        ),
+        migrations.AddIndex(
+            model_name='colleague',
+            index=models.Index(condition=models.Q(('confirmation_code__isnull', False)), fields=['is_account_confirmed'], name='colleague_pending_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resetpassword',
+            index=models.Index(fields=['status', 'created_at'], name='resetpassword_status_idx'),
+        ),
+        migrations.AlterModelTable(
+            name='confirmationcodestatus',
+            table='registrationconfirmationstatus',
+        ),
+    ]
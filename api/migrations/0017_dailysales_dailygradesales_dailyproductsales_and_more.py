@@ -0,0 +1,83 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:01
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_colleague_created_at_alter_promocode_status_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('date', models.DateField(unique=True)),
+                ('payments_count', models.PositiveIntegerField(default=0)),
+                ('amount_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Daily Sales',
+                'verbose_name_plural': 'Daily Sales',
+                'db_table': 'dailysales',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyGradeSales',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('grade', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='api.productgrade')),
+            ],
+            options={
+                'verbose_name': 'Daily Grade Sales',
+                'verbose_name_plural': 'Daily Grade Sales',
+                'db_table': 'dailygradesales',
+                'constraints': [models.UniqueConstraint(fields=('date', 'grade'), name='dailygradesales_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='api.product')),
+            ],
+            options={
+                'verbose_name': 'Daily Product Sales',
+                'verbose_name_plural': 'Daily Product Sales',
+                'db_table': 'dailyproductsales',
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='dailyproductsales_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyThemeSales',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('theme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='api.thoughttheme')),
+            ],
+            options={
+                'verbose_name': 'Daily Theme Sales',
+                'verbose_name_plural': 'Daily Theme Sales',
+                'db_table': 'dailythemesales',
+                'constraints': [models.UniqueConstraint(fields=('date', 'theme'), name='dailythemesales_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_order_order_colleague_recent_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('order_number', models.CharField(max_length=255)),
+                ('event', models.CharField(choices=[('created', 'Created'), ('status_changed', 'Status Changed'), ('payment_status_changed', 'Payment Status Changed'), ('payment_received', 'Payment Received')], max_length=32)),
+                ('status', models.CharField(blank=True, max_length=255, null=True)),
+                ('payment_status', models.CharField(blank=True, max_length=255, null=True)),
+                ('amount_paid', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='api.order')),
+            ],
+            options={
+                'verbose_name': 'Order Event',
+                'verbose_name_plural': 'Order Events',
+                'db_table': 'orderevent',
+                'indexes': [models.Index(fields=['order_number', 'id'], name='orderevent_order_idx')],
+            },
+        ),
+    ]
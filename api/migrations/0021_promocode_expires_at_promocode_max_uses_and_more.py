@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_orderevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promocode',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='promocode',
+            name='max_uses',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='promocode',
+            name='times_used',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_promocode_expires_at_promocode_max_uses_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promocode',
+            name='campaign',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
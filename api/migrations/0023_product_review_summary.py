@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:15
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_review_summary(apps, schema_editor):
+    Product = apps.get_model("api", "Product")
+    ProductReview = apps.get_model("api", "ProductReview")
+    reviews = ProductReview.objects.filter(product=OuterRef("pk")).values("product")
+    Product.objects.update(
+        review_count=Coalesce(
+            Subquery(reviews.annotate(count=Count("id")).values("count")), 0
+        ),
+        latest_review_at=Subquery(
+            reviews.annotate(latest=Max("added_at")).values("latest")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_promocode_campaign'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='latest_review_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', '-added_at'], name='productreview_recent_idx'),
+        ),
+        migrations.RunPython(backfill_review_summary, migrations.RunPython.noop),
+    ]
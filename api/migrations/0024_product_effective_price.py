@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:23
+
+from decimal import ROUND_HALF_UP, Decimal
+from django.db import migrations, models
+
+
+def backfill_effective_price(apps, schema_editor):
+    # Product.calculate_effective_price is not available on historical models
+    Product = apps.get_model("api", "Product")
+    products = []
+    for product in Product.objects.only("id", "unit_price", "discount").iterator():
+        product.effective_price = (
+            product.unit_price * (100 - product.discount) / 100
+        ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        products.append(product)
+    Product.objects.bulk_update(products, ["effective_price"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_product_review_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0.0, editable=False, max_digits=6),
+        ),
+        migrations.RunPython(backfill_effective_price, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['grade', 'effective_price'], name='product_grade_effective_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price'], name='product_effective_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:24
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_sales_count(apps, schema_editor):
+    Product = apps.get_model("api", "Product")
+    OrderItems = apps.get_model("api", "OrderItems")
+    sold = (
+        OrderItems.objects.filter(product=OuterRef("pk"))
+        .values("product")
+        .annotate(total=Sum("qty"))
+        .values("total")
+    )
+    Product.objects.update(sales_count=Coalesce(Subquery(sold), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_product_effective_price'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_recent_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_effective_idx',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sales_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_sales_count, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='name',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-added_at', '-id'], name='product_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='product_effective_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name', 'id'], name='product_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-sales_count', 'id'], name='product_best_selling_idx'),
+        ),
+    ]
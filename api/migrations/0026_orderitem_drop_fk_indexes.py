@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_product_catalog_sorts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='orderitems',
+            name='order',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='items', to='api.order'),
+        ),
+        migrations.AlterField(
+            model_name='orderitems',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='orders', to='api.product'),
+        ),
+    ]
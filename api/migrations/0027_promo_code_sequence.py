@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:46
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_orderitem_drop_fk_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromoCodeSequence',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('prefix', models.CharField(max_length=64, unique=True)),
+                ('next_index', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Promo Code Sequence',
+                'verbose_name_plural': 'Promo Code Sequences',
+                'db_table': 'promocodesequence',
+            },
+        ),
+    ]
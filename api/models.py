@@ -1,3 +1,4 @@
+from decimal import ROUND_HALF_UP, Decimal
 from typing import Iterable
 import uuid
 from django.db import models
@@ -109,6 +110,14 @@ class Colleague(AbstractBaseUser):
         db_table = "colleague"
         verbose_name = "Colleague"
         verbose_name_plural = "Colleagues"
+        indexes = [
+            # only rows still holding a confirmation code, see api.sweepers
+            models.Index(
+                fields=["is_account_confirmed"],
+                condition=models.Q(confirmation_code__isnull=False),
+                name="colleague_pending_code_idx",
+            ),
+        ]
 
 
 RESET_PASSWORD_STATUS_CHOICES = {
@@ -180,6 +189,11 @@ class ResetPassword(models.Model):
 
     class Meta:
         db_table = "resetpassword"
+        indexes = [
+            models.Index(
+                fields=["status", "created_at"], name="resetpassword_status_idx"
+            ),
+        ]
 
 
 class ProductType(models.Model):
@@ -247,7 +261,7 @@ class FrameType(models.Model):
 
 class Product(models.Model):
     id = models.UUIDField(default=uuid.uuid4, primary_key=True)
-    name = models.CharField(max_length=255, db_index=True)
+    name = models.CharField(max_length=255)
     product_type = models.ForeignKey(
         ProductType,
         on_delete=models.SET_DEFAULT,
@@ -270,6 +284,16 @@ class Product(models.Model):
     description = models.TextField(default="-")
     return_policy = models.TextField(blank=True, null=True)
     discount = models.DecimalField(max_digits=3, decimal_places=1, default=0.00)
+    # unit_price less the discount percentage, what customers pay. stored so
+    # the catalog can filter and sort on it with an index
+    effective_price = models.DecimalField(
+        max_digits=6, decimal_places=2, default=0.00, editable=False
+    )
+    # units sold over all time, kept up to date with the sales rollups
+    sales_count = models.PositiveIntegerField(default=0)
+    # kept up to date by the review signals, see api.reviews
+    review_count = models.PositiveIntegerField(default=0)
+    latest_review_at = models.DateTimeField(blank=True, null=True)
 
     added_at = models.DateTimeField(auto_now_add=True)
     added_by = models.ForeignKey(
@@ -281,11 +305,45 @@ class Product(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    def calculate_effective_price(self) -> Decimal:
+        unit_price = Decimal(str(self.unit_price))
+        discount = Decimal(str(self.discount))
+        return (unit_price * (100 - discount) / 100).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+
+    def save(self, **kwargs) -> None:
+        # bulk_create and bulk_update skip this, set it before calling them
+        self.effective_price = self.calculate_effective_price()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"unit_price", "discount"} & set(
+            update_fields
+        ):
+            kwargs["update_fields"] = {*update_fields, "effective_price"}
+        super().save(**kwargs)
+
     class Meta:
         db_table = "product"
         verbose_name = "Product"
         verbose_name_plural = "Products"
         ordering = ["-added_at"]
+        indexes = [
+            # ProductFilter: grade with a price range, price range alone
+            models.Index(
+                fields=["grade", "unit_price"], name="product_grade_price_idx"
+            ),
+            models.Index(fields=["unit_price"], name="product_price_idx"),
+            models.Index(
+                fields=["grade", "effective_price"],
+                name="product_grade_effective_idx",
+            ),
+            # the catalog sorts, see api.products.PRODUCT_SORTS. the id
+            # breaks ties so keyset pagination can seek past equal keys
+            models.Index(fields=["-added_at", "-id"], name="product_recent_idx"),
+            models.Index(fields=["effective_price", "id"], name="product_effective_idx"),
+            models.Index(fields=["name", "id"], name="product_name_idx"),
+            models.Index(fields=["-sales_count", "id"], name="product_best_selling_idx"),
+        ]
 
 
 class Dimension(models.Model):
@@ -337,6 +395,12 @@ class ProductReview(models.Model):
         verbose_name = "Product Review"
         verbose_name_plural = "Product Reviews"
         ordering = ["-added_at"]
+        indexes = [
+            # the paginated reviews of a product, newest first
+            models.Index(
+                fields=["product", "-added_at"], name="productreview_recent_idx"
+            ),
+        ]
 
 
 class PromoCode(models.Model):
@@ -347,6 +411,12 @@ class PromoCode(models.Model):
     status = models.CharField(
         max_length=7, choices=PROMO_CODE_STATUS_CHOICES, default="invalid"
     )
+    # codes generated together, see api.promo_codes.create_promo_codes
+    campaign = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    # only ever changed with database-side increments, see api.promo_codes
+    times_used = models.PositiveIntegerField(default=0)
+    max_uses = models.PositiveIntegerField(blank=True, null=True)
+    expires_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self) -> str:
@@ -358,6 +428,25 @@ class PromoCode(models.Model):
         verbose_name_plural = "Promo Codes"
 
 
+class PromoCodeSequence(models.Model):
+    """
+    The next promo code index of a code prefix, see
+    api.promo_codes.create_promo_codes.
+    """
+
+    id = models.UUIDField(default=uuid.uuid4, primary_key=True)
+    prefix = models.CharField(max_length=64, unique=True)
+    next_index = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.prefix} {self.next_index}"
+
+    class Meta:
+        db_table = "promocodesequence"
+        verbose_name = "Promo Code Sequence"
+        verbose_name_plural = "Promo Code Sequences"
+
+
 class Order(models.Model):
     id = models.UUIDField(default=uuid.uuid4, primary_key=True)
     order_number = models.CharField(
@@ -406,13 +495,24 @@ class Order(models.Model):
 
     class Meta:
         db_table = "order"
+        indexes = [
+            # date range scans of the reports and api.rollups
+            models.Index(fields=["order_date"], name="order_date_idx"),
+            # a colleague's orders, newest first
+            models.Index(
+                fields=["added_by", "-created_at"], name="order_colleague_recent_idx"
+            ),
+        ]
 
 
 class OrderItems(models.Model):
     id = models.UUIDField(default=uuid.uuid4, primary_key=True)
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
+    # indexed by the composite indexes in Meta instead
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="items", db_index=False
+    )
     product = models.ForeignKey(
-        Product, on_delete=models.CASCADE, related_name="orders"
+        Product, on_delete=models.CASCADE, related_name="orders", db_index=False
     )
     qty = models.PositiveIntegerField(default=ORDER_QTY_DEFAULT)
     tax = models.DecimalField(max_digits=6, decimal_places=2, default=0.00)
@@ -452,6 +552,15 @@ class OrderItems(models.Model):
         db_table = "orderitem"
         verbose_name = "Order Item"
         verbose_name_plural = "Order Items"
+        indexes = [
+            # cover the order <-> product join from both sides
+            models.Index(
+                fields=["order", "product"], name="orderitem_order_product_idx"
+            ),
+            models.Index(
+                fields=["product", "order"], name="orderitem_product_order_idx"
+            ),
+        ]
 
 
 class OrderPaymentStatus(models.Model):
@@ -528,3 +637,130 @@ class PaymentInfo(models.Model):
         db_table = "paymentinfo"
         verbose_name = "Payment Info"
         verbose_name_plural = "Payment Infos"
+
+
+ORDER_EVENT_CHOICES = [
+    ("created", "Created"),
+    ("status_changed", "Status Changed"),
+    ("payment_status_changed", "Payment Status Changed"),
+    ("payment_received", "Payment Received"),
+]
+
+
+class OrderEvent(models.Model):
+    """
+    Append-only log of order changes, see api.events.
+    """
+
+    # sequential so the change feed can use it as its cursor
+    id = models.BigAutoField(primary_key=True)
+    order = models.ForeignKey(
+        Order, on_delete=models.SET_NULL, null=True, related_name="events"
+    )
+    order_number = models.CharField(max_length=255)
+    event = models.CharField(max_length=32, choices=ORDER_EVENT_CHOICES)
+    status = models.CharField(max_length=255, blank=True, null=True)
+    payment_status = models.CharField(max_length=255, blank=True, null=True)
+    amount_paid = models.DecimalField(
+        max_digits=6, decimal_places=2, blank=True, null=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.order_number} {self.event}"
+
+    class Meta:
+        db_table = "orderevent"
+        verbose_name = "Order Event"
+        verbose_name_plural = "Order Events"
+        indexes = [
+            # the feed of a single order
+            models.Index(fields=["order_number", "id"], name="orderevent_order_idx"),
+        ]
+
+
+class SalesRollup(models.Model):
+    """
+    Sales counters for one day, kept up to date by api.rollups.
+    """
+
+    id = models.UUIDField(default=uuid.uuid4, primary_key=True)
+    date = models.DateField()
+    orders_count = models.PositiveIntegerField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailySales(SalesRollup):
+    date = models.DateField(unique=True)
+    payments_count = models.PositiveIntegerField(default=0)
+    amount_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self) -> str:
+        return f"{self.date}"
+
+    class Meta:
+        db_table = "dailysales"
+        verbose_name = "Daily Sales"
+        verbose_name_plural = "Daily Sales"
+
+
+class DailyProductSales(SalesRollup):
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+
+    def __str__(self) -> str:
+        return f"{self.date} {self.product_id}"
+
+    class Meta:
+        db_table = "dailyproductsales"
+        verbose_name = "Daily Product Sales"
+        verbose_name_plural = "Daily Product Sales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "product"], name="dailyproductsales_unique"
+            ),
+        ]
+
+
+class DailyGradeSales(SalesRollup):
+    grade = models.ForeignKey(
+        ProductGrade, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+
+    def __str__(self) -> str:
+        return f"{self.date} {self.grade_id}"
+
+    class Meta:
+        db_table = "dailygradesales"
+        verbose_name = "Daily Grade Sales"
+        verbose_name_plural = "Daily Grade Sales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "grade"], name="dailygradesales_unique"
+            ),
+        ]
+
+
+class DailyThemeSales(SalesRollup):
+    # an item counts once for every theme of its product
+    theme = models.ForeignKey(
+        ThoughtTheme, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+
+    def __str__(self) -> str:
+        return f"{self.date} {self.theme_id}"
+
+    class Meta:
+        db_table = "dailythemesales"
+        verbose_name = "Daily Theme Sales"
+        verbose_name_plural = "Daily Theme Sales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "theme"], name="dailythemesales_unique"
+            ),
+        ]
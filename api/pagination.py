@@ -0,0 +1,141 @@
+import base64
+import binascii
+import datetime
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from helpers.defaults import (
+    PRODUCT_PAGE_SIZE,
+    PRODUCT_REVIEW_PAGE_SIZE,
+    REPORT_PAGE_SIZE,
+)
+
+
+class ReportPagination(PageNumberPagination):
+    page_size = REPORT_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class OrderHistoryPagination(CursorPagination):
+    """
+    Keyset pagination over order_colleague_recent_idx, every page is an
+    index range read however long the history is.
+    """
+
+    ordering = "-created_at"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class ProductReviewPagination(CursorPagination):
+    """
+    Keyset pagination over productreview_recent_idx.
+    """
+
+    ordering = "-added_at"
+    page_size = PRODUCT_REVIEW_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward only cursor pagination over the ordering of the queryset, which
+    has to end with a unique field. The cursor holds every sort key of the
+    last row, so rows sharing the leading keys are neither repeated nor
+    skipped, unlike CursorPagination which only keeps the first key and
+    counts the ties with an offset.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = [
+            (field.lstrip("-"), field.startswith("-"))
+            for field in queryset.query.order_by
+        ]
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request, queryset.model)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor))
+        rows = list(queryset[: page_size + 1])
+        self.last = rows[page_size - 1] if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def after(self, cursor: list) -> Q:
+        """
+        Rows sorting after the `cursor` keys. The range on the first key
+        lets the database seek into the index before checking the rest.
+        """
+        condition = None
+        for (field, descending), value in reversed(list(zip(self.ordering, cursor))):
+            lookup = "lt" if descending else "gt"
+            after = Q(**{f"{field}__{lookup}": value})
+            if condition is not None:
+                after |= Q(**{field: value}) & condition
+            condition = after
+        field, descending = self.ordering[0]
+        return Q(**{f"{field}__{'lte' if descending else 'gte'}": cursor[0]}) & condition
+
+    def encode_cursor(self, row) -> str:
+        values = []
+        for field, _ in self.ordering:
+            value = getattr(row, field)
+            # isoformat keeps the microseconds, which DjangoJSONEncoder drops
+            values.append(
+                value.isoformat() if isinstance(value, datetime.datetime) else str(value)
+            )
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, request, model) -> list | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field).to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self) -> str | None:
+        if self.last is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.last),
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+
+class ProductCatalogPagination(KeysetPagination):
+    page_size = PRODUCT_PAGE_SIZE
@@ -0,0 +1,153 @@
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import serializers, status
+from .models import (
+    Color,
+    Dimension,
+    FrameType,
+    Product,
+    ProductImage,
+    ThoughtTheme,
+)
+from helpers.defaults import PRODUCT_BULK_UPDATE_BATCH_SIZE
+
+# ?sort= of the catalog, every ordering is covered by a product index and ends
+# with the primary key for keyset pagination
+PRODUCT_SORTS = {
+    "newest": ["-added_at", "-id"],
+    "price": ["effective_price", "id"],
+    "name": ["name", "id"],
+    "best-selling": ["-sales_count", "id"],
+}
+
+PRODUCT_DEFAULT_SORT = "newest"
+
+# changes whenever prices or stock change in bulk, cached responses built
+# from the catalog include it in their key
+CATALOG_VERSION_KEY = "catalog:version"
+
+PRODUCT_DETAIL_FIELDS = [
+    "id",
+    "name",
+    "product_type_id",
+    "product_type__name",
+    "grade_id",
+    "grade__name",
+    "weight",
+    "unit_price",
+    "effective_price",
+    "qty",
+    "description",
+    "return_policy",
+    "review_count",
+    "latest_review_at",
+]
+
+# formats the timestamp exactly like the serializers do
+_datetime_field = serializers.DateTimeField()
+
+
+def product_detail(pk, request=None) -> dict | None:
+    """
+    The ProductSerializer representation of a product, read with six
+    `values()` queries and no model instances. None when it does not exist.
+    """
+    row = (
+        Product.objects.filter(pk=pk)
+        .order_by()
+        .values(*PRODUCT_DETAIL_FIELDS)
+        .first()
+    )
+    if row is None:
+        return None
+
+    photo_storage = ProductImage._meta.get_field("photo").storage
+
+    def photo_url(name):
+        if not name:
+            return None
+        url = photo_storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+    return {
+        "id": str(row["id"]),
+        "name": row["name"],
+        "product_type": {
+            "id": row["product_type_id"],
+            "name": row["product_type__name"],
+        },
+        "grade": {"id": row["grade_id"], "name": row["grade__name"]},
+        "themes": list(ThoughtTheme.objects.filter(products=pk).values("id", "name")),
+        "sizes": list(
+            Dimension.objects.filter(product=pk).values("id", "width", "height")
+        ),
+        "weight": str(row["weight"]),
+        "colors": list(Color.objects.filter(product=pk).values("id", "name")),
+        "frame_types": list(FrameType.objects.filter(product=pk).values("id", "name")),
+        "unit_price": str(row["unit_price"]),
+        "effective_price": str(row["effective_price"]),
+        "qty": row["qty"],
+        "description": row["description"],
+        "images": [
+            {
+                "id": str(image["id"]),
+                "photo": photo_url(image["photo"]),
+                "description": image["description"],
+            }
+            for image in ProductImage.objects.filter(product=pk).values(
+                "id", "photo", "description"
+            )
+        ],
+        "return_policy": row["return_policy"],
+        "review_count": row["review_count"],
+        "latest_review_at": (
+            _datetime_field.to_representation(row["latest_review_at"])
+            if row["latest_review_at"]
+            else None
+        ),
+    }
+
+
+def catalog_version() -> str:
+    return cache.get_or_set(CATALOG_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def invalidate_catalog():
+    cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+@transaction.atomic
+def bulk_update_products(patches: list) -> int:
+    """
+    Apply validated `{id, unit_price, discount, qty}` patches with one
+    bulk_update. Fails without changing anything when a product does not
+    exist. Returns the number of updated products.
+    """
+    patches = {patch["id"]: patch for patch in patches}
+    fields = sorted({field for patch in patches.values() for field in patch} - {"id"})
+    products = list(
+        Product.objects.select_for_update()
+        .filter(pk__in=patches)
+        .order_by()
+        .only("id", "unit_price", "discount", *fields)
+    )
+    missing = patches.keys() - {product.id for product in products}
+    if missing:
+        raise serializers.ValidationError(
+            {"id": [f"Product {pk} does not exist." for pk in sorted(map(str, missing))]},
+            code=status.HTTP_400_BAD_REQUEST,
+        )
+    for product in products:
+        for field, value in patches[product.id].items():
+            setattr(product, field, value)
+        product.effective_price = product.calculate_effective_price()
+    # bulk_update skips Product.save(), the effective price is set above
+    if {"unit_price", "discount"} & set(fields):
+        fields.append("effective_price")
+    Product.objects.bulk_update(
+        products, fields, batch_size=PRODUCT_BULK_UPDATE_BATCH_SIZE
+    )
+    # once for the whole batch, and only when it is committed
+    transaction.on_commit(invalidate_catalog)
+    return len(products)
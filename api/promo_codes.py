@@ -0,0 +1,144 @@
+import itertools
+import re
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Length
+from django.utils import timezone
+from rest_framework import serializers, status
+from .models import PromoCode, PromoCodeSequence
+from helpers.defaults import PROMO_CODE_BATCH_SIZE, PROMO_CODE_CACHE_SECONDS
+from helpers.generators import (
+    PROMO_CODE_RANDOM_LENGTH,
+    decode_base32,
+    generate_promo_codes,
+)
+
+
+def promo_code_cache_key(code: str) -> str:
+    return f"promo_code:{code}"
+
+
+def get_promo_code(code: str) -> PromoCode | None:
+    """
+    The promo code named `code`, from the cache when possible. Unknown codes
+    are cached too, so a burst of bad codes doesn't reach the database.
+    """
+    key = promo_code_cache_key(code)
+    promo_code = cache.get(key)
+    if promo_code is None:
+        promo_code = PromoCode.objects.filter(code=code).first() or False
+        cache.set(key, promo_code, PROMO_CODE_CACHE_SECONDS)
+    return promo_code or None
+
+
+def invalidate_promo_code(*codes):
+    cache.delete_many([promo_code_cache_key(code) for code in codes if code])
+
+
+def resolve_promo_code(code: str) -> PromoCode | None:
+    """
+    Validate a code entered at checkout without querying the database
+    for codes already in the cache.
+    """
+    if not code:
+        return None
+    promo_code = get_promo_code(code)
+    if promo_code is None:
+        raise serializers.ValidationError(
+            "Promo code does not exist", code=status.HTTP_400_BAD_REQUEST
+        )
+    if promo_code.expires_at and promo_code.expires_at <= timezone.now():
+        raise serializers.ValidationError(
+            "Promo code has expired", code=status.HTTP_400_BAD_REQUEST
+        )
+    return promo_code
+
+
+def redeem_promo_code(promo_code: PromoCode) -> bool:
+    """
+    Count one use of `promo_code`, False when it has no uses left.
+
+    Limited codes are checked and counted by a single conditional UPDATE, the
+    row stays locked only until the order commits. Unlimited codes are
+    counted after the commit so checkouts never wait on each other.
+    """
+    uses = PromoCode.objects.filter(pk=promo_code.pk)
+    if promo_code.max_uses is None:
+        transaction.on_commit(lambda: uses.update(times_used=F("times_used") + 1))
+        return True
+    return bool(
+        uses.filter(
+            Q(max_uses__isnull=True) | Q(times_used__lt=F("max_uses"))
+        ).update(times_used=F("times_used") + 1)
+    )
+
+
+def campaign_prefix(campaign: str) -> str:
+    prefix = re.sub(r"[^A-Z0-9]", "", campaign.upper())
+    if not prefix:
+        raise ValueError("The campaign name needs at least one letter or digit")
+    return prefix
+
+
+def create_promo_codes(
+    campaign: str,
+    count: int,
+    batch_size: int = PROMO_CODE_BATCH_SIZE,
+    **fields,
+):
+    """
+    Create `count` more promo codes for `campaign` with chunked bulk inserts
+    and yield each chunk of codes once it is saved. `fields` are set on every
+    code, e.g. value and expires_at; codes are single use unless max_uses
+    says otherwise.
+
+    Codes are numbered from a range reserved for the run, so running it
+    again, even at the same time, adds new codes.
+    """
+    prefix = campaign_prefix(campaign)
+    start = reserve_promo_code_indexes(prefix, count)
+    fields.setdefault("status", "valid")
+    fields.setdefault("max_uses", 1)
+    codes = generate_promo_codes(prefix, start, count)
+    with transaction.atomic():
+        while chunk := list(itertools.islice(codes, batch_size)):
+            PromoCode.objects.bulk_create(
+                [PromoCode(code=code, campaign=campaign, **fields) for code in chunk]
+            )
+            # bulk_create sends no post_save, a cached miss of a code
+            # looked up before it existed is dropped here instead
+            transaction.on_commit(lambda chunk=chunk: invalidate_promo_code(*chunk))
+            yield chunk
+
+
+def next_promo_code_index(prefix: str) -> int:
+    """
+    The index after the highest one used by a code of `prefix`. Longer
+    indexes are larger and indexes of the same length sort like the codes.
+    """
+    code = (
+        PromoCode.objects.filter(code__startswith=f"{prefix}-")
+        .order_by(Length("code").desc(), "-code")
+        .values_list("code", flat=True)
+        .first()
+    )
+    if code is None:
+        return 0
+    return decode_base32(code[len(prefix) + 1 : -PROMO_CODE_RANDOM_LENGTH]) + 1
+
+
+@transaction.atomic
+def reserve_promo_code_indexes(prefix: str, count: int) -> int:
+    """
+    Reserve `count` promo code indexes of `prefix`, returns the first one.
+    The sequence row stays locked only for this short transaction. Prefixes
+    without one start after the codes created before sequences existed.
+    """
+    sequence, created = PromoCodeSequence.objects.select_for_update().get_or_create(
+        prefix=prefix
+    )
+    start = next_promo_code_index(prefix) if created else sequence.next_index
+    sequence.next_index = start + count
+    sequence.save(update_fields=["next_index"])
+    return start
@@ -0,0 +1,134 @@
+from datetime import date, timedelta
+from django.db.models import (
+    Avg,
+    Count,
+    DateField,
+    FloatField,
+    Max,
+    Min,
+    Q,
+    Sum,
+    Window,
+)
+from django.db.models.functions import (
+    Cast,
+    Coalesce,
+    DenseRank,
+    NullIf,
+    Round,
+    Trunc,
+)
+from django.utils import timezone
+from .models import DailyProductSales, DailySales, Order, Product, PromoCode
+from .rollups import start_of
+
+
+def top_sellers(start: date, end: date):
+    """
+    Products ranked by revenue between `start` and `end`, from the rollups.
+    """
+    return (
+        DailyProductSales.objects.filter(date__range=(start, end))
+        .values("product_id", "product__name", "product__grade__name")
+        .annotate(
+            rank=Window(DenseRank(), order_by=Sum("revenue").desc()),
+            total_orders=Sum("orders_count"),
+            total_units=Sum("units_sold"),
+            total_revenue=Round(Sum("revenue"), 2),
+        )
+        .order_by("rank", "product__name")
+    )
+
+
+def revenue_by_period(start: date, end: date, period: str = "day"):
+    """
+    Orders, revenue, payments and average order value per day, week or month.
+    """
+    return (
+        DailySales.objects.filter(date__range=(start, end))
+        .annotate(period=Trunc("date", period, output_field=DateField()))
+        .values("period")
+        .annotate(
+            total_orders=Sum("orders_count"),
+            total_units=Sum("units_sold"),
+            total_revenue=Round(Sum("revenue"), 2),
+            total_paid=Round(Sum("amount_paid"), 2),
+            average_order_value=Round(
+                Sum("revenue") / NullIf(Sum("orders_count"), 0), 2
+            ),
+        )
+        .order_by("period")
+    )
+
+
+def orders_between(start: date, end: date):
+    """
+    Orders placed from `start` to `end` (inclusive), filtered on datetime
+    bounds so that order_date_idx is used.
+    """
+    return Order.objects.filter(
+        order_date__gte=start_of(start), order_date__lt=start_of(end + timedelta(days=1))
+    )
+
+
+def average_order_value(start: date, end: date) -> dict:
+    """
+    Order value statistics, including tax and promo codes, in one query.
+    """
+    return orders_between(start, end).aggregate(
+        orders_count=Count("id"),
+        average_order_value=Round(Avg("total_order_cost"), 2),
+        min_order_value=Min("total_order_cost"),
+        max_order_value=Max("total_order_cost"),
+        average_items_count=Round(Avg("total_items_count"), 2),
+    )
+
+
+def promo_code_usage(start: date, end: date):
+    """
+    Promo codes used on orders between `start` and `end`, most used first.
+    """
+    in_range = Q(
+        order__order_date__gte=start_of(start),
+        order__order_date__lt=start_of(end + timedelta(days=1)),
+    )
+    return (
+        PromoCode.objects.annotate(
+            uses=Count("order", filter=in_range),
+            order_revenue=Round(Sum("order__total_order_cost", filter=in_range), 2),
+            rank=Window(DenseRank(), order_by=Count("order", filter=in_range).desc()),
+        )
+        .filter(uses__gt=0)
+        .values(
+            "id",
+            "code",
+            "status",
+            "value",
+            "value_percentage",
+            "uses",
+            "order_revenue",
+            "rank",
+        )
+        .order_by("rank", "code")
+    )
+
+
+def low_stock_products(threshold: int, days: int = 30):
+    """
+    Products with at most `threshold` units left, the emptiest first, with
+    the units sold over the last `days` days and how many days the stock
+    lasts at that pace.
+    """
+    recent = Q(daily_sales__date__gt=timezone.localdate() - timedelta(days=days))
+    units_sold = Coalesce(Sum("daily_sales__units_sold", filter=recent), 0)
+    return (
+        Product.objects.filter(qty__lte=threshold)
+        .annotate(
+            units_sold=units_sold,
+            days_of_stock=Round(
+                Cast("qty", FloatField()) * days / NullIf(units_sold, 0), 1
+            ),
+        )
+        .values("id", "name", "grade__name", "qty", "units_sold", "days_of_stock")
+        .order_by("qty", "name")
+    )
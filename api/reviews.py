@@ -0,0 +1,172 @@
+import atexit
+import logging
+import queue
+import threading
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from .models import Colleague, Product, ProductReview
+from helpers.defaults import REVIEW_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def record_reviews(product_id, count: int, latest_at):
+    """
+    Add `count` reviews, the newest submitted at `latest_at`, to the review
+    summary of a product in a single update.
+    """
+    Product.objects.filter(pk=product_id).update(
+        review_count=F("review_count") + count,
+        latest_review_at=Case(
+            When(latest_review_at__gte=latest_at, then=F("latest_review_at")),
+            default=Value(latest_at),
+        ),
+    )
+
+
+def record_review(review: ProductReview):
+    record_reviews(review.product_id, 1, review.added_at)
+
+
+def forget_review(review: ProductReview):
+    """
+    Take a deleted review out of the summary of its product. The newest
+    remaining review is read from productreview_recent_idx.
+    """
+    Product.objects.filter(pk=review.product_id).update(
+        review_count=F("review_count") - 1,
+        latest_review_at=Subquery(
+            ProductReview.objects.filter(product=OuterRef("pk"))
+            .order_by("-added_at")
+            .values("added_at")[:1]
+        ),
+    )
+
+
+@transaction.atomic
+def save_reviews(reviews: list) -> list:
+    """
+    Insert `reviews` with one bulk insert and update the summary of each
+    reviewed product once. Reviews of products or colleagues deleted since
+    they were submitted are dropped. Returns the saved reviews.
+    """
+    product_ids = set(
+        Product.objects.filter(pk__in={review.product_id for review in reviews})
+        .order_by()
+        .values_list("id", flat=True)
+    )
+    user_ids = set(
+        Colleague.objects.filter(pk__in={review.user_id for review in reviews})
+        .order_by()
+        .values_list("id", flat=True)
+    )
+    reviews = [
+        review
+        for review in reviews
+        if review.product_id in product_ids and review.user_id in user_ids
+    ]
+    # bulk_create sends no post_save, the summary is updated here instead
+    ProductReview.objects.bulk_create(reviews, batch_size=REVIEW_BATCH_SIZE)
+    summaries = {}
+    for review in reviews:
+        count, latest_at = summaries.get(review.product_id, (0, review.added_at))
+        summaries[review.product_id] = (count + 1, max(latest_at, review.added_at))
+    for product_id, (count, latest_at) in summaries.items():
+        record_reviews(product_id, count, latest_at)
+    return reviews
+
+
+class ReviewWriter(threading.Thread):
+    """
+    Daemon thread saving submitted reviews in batches: whenever
+    REVIEW_BATCH_SIZE of them are waiting, and every `interval` seconds.
+    A burst of reviews then costs a few bulk inserts instead of an insert
+    and a product update per review.
+    """
+
+    def __init__(self, interval: float, batch_size: int = REVIEW_BATCH_SIZE):
+        super().__init__(name="review-writer", daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.reviews = queue.Queue()
+        self.batch_ready = threading.Event()
+
+    def submit(self, review: ProductReview):
+        self.reviews.put(review)
+        if self.reviews.qsize() >= self.batch_size:
+            self.batch_ready.set()
+
+    def flush(self) -> int:
+        """
+        Save everything submitted so far. Returns the number of reviews saved.
+        When a batch fails its reviews are saved one by one, and those that
+        still fail are queued again for the next flush.
+        """
+        saved = 0
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.reviews.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return saved
+            try:
+                saved += len(save_reviews(batch))
+            except Exception as e:
+                logger.exception(f"Error saving reviews, saving them one by one: {e}")
+                saved += self.save_one_by_one(batch)
+
+    def save_one_by_one(self, reviews: list) -> int:
+        saved, failed = 0, []
+        for review in reviews:
+            try:
+                saved += len(save_reviews([review]))
+            except Exception:
+                failed.append(review)
+        for review in failed:
+            self.reviews.put(review)
+        if failed:
+            # e.g. the database is down, retrying right away would not help
+            raise RuntimeError(f"{len(failed)} reviews could not be saved, queued again")
+        return saved
+
+    def run(self):
+        while True:
+            self.batch_ready.wait(self.interval)
+            self.batch_ready.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception(f"Error saving reviews: {e}")
+            finally:
+                close_old_connections()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_review_writer() -> ReviewWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = ReviewWriter(settings.REVIEW_BATCH_INTERVAL_SECONDS)
+            _writer.start()
+            # save what is still waiting when the process exits
+            atexit.register(_writer.flush)
+    return _writer
+
+
+def submit_review(review: ProductReview):
+    """
+    Queue `review` for the review writer of this process, or save it right
+    away when REVIEW_BATCH_INTERVAL_SECONDS is 0.
+    """
+    if settings.REVIEW_BATCH_INTERVAL_SECONDS:
+        get_review_writer().submit(review)
+    else:
+        save_reviews([review])
@@ -0,0 +1,295 @@
+import copy
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
+from .models import (
+    DailyGradeSales,
+    DailyProductSales,
+    DailySales,
+    DailyThemeSales,
+    Order,
+    OrderItems,
+    PaymentInfo,
+    Product,
+)
+
+ROLLUP_MODELS = [DailySales, DailyProductSales, DailyGradeSales, DailyThemeSales]
+
+
+def add_to_rollup(model, lookup: dict, **deltas):
+    """
+    Add `deltas` to the counters of the rollup row matching `lookup`,
+    creating the row the first time the key is seen.
+    """
+    increments = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # another transaction created the row first
+        model.objects.filter(**lookup).update(**increments)
+
+
+def sales_date(moment) -> date:
+    return timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+
+
+def start_of(day: date) -> datetime:
+    """
+    The first moment of `day` in the current time zone. Filtering on
+    `field__gte=start_of(start), field__lt=start_of(end + 1 day)` can use an
+    index on the field, unlike `field__date__range`.
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def record_order(order: Order, sign: int = 1):
+    add_to_rollup(DailySales, {"date": sales_date(order.order_date)}, orders_count=sign)
+
+
+def record_order_item(item: OrderItems, sign: int = 1):
+    """
+    Count an order item in the daily totals and the product, grade and theme
+    rollups of its order date, and in the sales count of the product.
+    `sign=-1` takes it back out.
+    """
+    day = sales_date(item.order.order_date)
+    product = item.product
+    deltas = {
+        "units_sold": sign * item.qty,
+        "revenue": sign * Decimal(item.total_cost),
+    }
+    add_to_rollup(DailySales, {"date": day}, **deltas)
+    add_to_rollup(
+        DailyProductSales,
+        {"date": day, "product_id": product.id},
+        orders_count=sign,
+        **deltas,
+    )
+    add_to_rollup(
+        DailyGradeSales,
+        {"date": day, "grade_id": product.grade_id},
+        orders_count=sign,
+        **deltas,
+    )
+    for theme_id in product.themes.values_list("id", flat=True):
+        add_to_rollup(
+            DailyThemeSales,
+            {"date": day, "theme_id": theme_id},
+            orders_count=sign,
+            **deltas,
+        )
+    # the all time counter behind the best-selling catalog sort. bulk
+    # inserted items were never counted, so it must not go below zero
+    Product.objects.filter(pk=product.id).update(
+        sales_count=Greatest(F("sales_count") + sign * item.qty, 0)
+    )
+
+
+def record_payment(payment: PaymentInfo, sign: int = 1):
+    add_to_rollup(
+        DailySales,
+        {"date": sales_date(payment.payment_date)},
+        payments_count=sign,
+        amount_paid=sign * Decimal(payment.amount_paid),
+    )
+
+
+# the fields each rolled up model is counted by, and the function counting it
+ROLLED_UP_FIELDS = {
+    Order: ["order_date"],
+    OrderItems: ["order_id", "product_id", "qty", "total_cost"],
+    PaymentInfo: ["payment_date", "amount_paid"],
+}
+ROLLUP_RECORDERS = {
+    Order: record_order,
+    OrderItems: record_order_item,
+    PaymentInfo: record_payment,
+}
+
+
+def track_rolled_up_fields(instance):
+    """
+    Remember the values a row was loaded or last saved with, so an update
+    can take them back out of the rollups without querying the old row.
+    """
+    instance._rolled_up = {
+        field: instance.__dict__.get(field)
+        for field in ROLLED_UP_FIELDS[instance._meta.model]
+    }
+
+
+def rolled_up_change(instance) -> tuple | None:
+    """
+    Copies of an updated row as it was counted and as it is now, when a field
+    the rollups count changed, None otherwise. Rows loaded without those
+    fields are skipped.
+    """
+    counted = getattr(instance, "_rolled_up", {})
+    current = {field: instance.__dict__.get(field) for field in counted}
+    if not counted or None in counted.values() or counted == current:
+        return None
+    previous = copy.copy(instance)
+    for field, value in counted.items():
+        # also drops the cached order or product when it was changed
+        setattr(previous, field, value)
+    return previous, copy.copy(instance)
+
+
+def move_rolled_up(previous, current):
+    """
+    Take the counted version of an updated row out of the rollups and add
+    the current one. The items of an order moved to another date are moved
+    along with it.
+    """
+    record = ROLLUP_RECORDERS[current._meta.model]
+    record(previous, sign=-1)
+    record(current)
+    if isinstance(current, Order) and previous.order_date != current.order_date:
+        for item in current.items.select_related("product"):
+            item.order = previous
+            record_order_item(item, sign=-1)
+            item.order = current
+            record_order_item(item)
+
+
+@transaction.atomic
+def rebuild_rollups(start: date | None = None, end: date | None = None) -> dict:
+    """
+    Recompute the rollups of every day from `start` to `end` (inclusive,
+    unbounded when None) from the raw orders and payments.
+    Returns the number of rollup rows written per table.
+    """
+    orders = Order.objects.all()
+    items = OrderItems.objects.all()
+    payments = PaymentInfo.objects.all()
+    rollups = {model: model.objects.all() for model in ROLLUP_MODELS}
+    if start:
+        orders = orders.filter(order_date__gte=start_of(start))
+        items = items.filter(order__order_date__gte=start_of(start))
+        payments = payments.filter(payment_date__gte=start_of(start))
+        rollups = {model: rows.filter(date__gte=start) for model, rows in rollups.items()}
+    if end:
+        until = start_of(end + timedelta(days=1))
+        orders = orders.filter(order_date__lt=until)
+        items = items.filter(order__order_date__lt=until)
+        payments = payments.filter(payment_date__lt=until)
+        rollups = {model: rows.filter(date__lte=end) for model, rows in rollups.items()}
+
+    items = items.annotate(day=TruncDate("order__order_date"))
+    item_totals = {
+        "orders_count": Count("id"),
+        "units_sold": Sum("qty"),
+        "revenue": Sum("total_cost"),
+    }
+
+    daily = {}
+    for row in (
+        orders.annotate(day=TruncDate("order_date"))
+        .values("day")
+        .annotate(orders_count=Count("id"))
+    ):
+        daily[row["day"]] = DailySales(date=row["day"], orders_count=row["orders_count"])
+    for row in items.values("day").annotate(
+        units_sold=Sum("qty"), revenue=Sum("total_cost")
+    ):
+        rollup = daily.setdefault(row["day"], DailySales(date=row["day"]))
+        rollup.units_sold, rollup.revenue = row["units_sold"], row["revenue"]
+    for row in (
+        payments.annotate(day=TruncDate("payment_date"))
+        .values("day")
+        .annotate(payments_count=Count("id"), amount_paid=Sum("amount_paid"))
+    ):
+        rollup = daily.setdefault(row["day"], DailySales(date=row["day"]))
+        rollup.payments_count, rollup.amount_paid = (
+            row["payments_count"],
+            row["amount_paid"],
+        )
+
+    rows = {
+        DailySales: list(daily.values()),
+        DailyProductSales: [
+            DailyProductSales(date=row.pop("day"), **row)
+            for row in items.values("day", "product_id").annotate(**item_totals)
+        ],
+        DailyGradeSales: [
+            DailyGradeSales(date=row.pop("day"), grade_id=row.pop("product__grade"), **row)
+            for row in items.values("day", "product__grade").annotate(**item_totals)
+        ],
+        DailyThemeSales: [
+            DailyThemeSales(date=row.pop("day"), theme_id=row.pop("product__themes"), **row)
+            for row in items.filter(product__themes__isnull=False)
+            .values("day", "product__themes")
+            .annotate(**item_totals)
+        ],
+    }
+
+    for model, existing in rollups.items():
+        existing.delete()
+        model.objects.bulk_create(rows[model], batch_size=1000)
+    return {model._meta.db_table: len(rows[model]) for model in ROLLUP_MODELS}
+
+
+def rebuild_sales_counts() -> int:
+    """
+    Recount Product.sales_count from the order items.
+    Returns the number of products updated.
+    """
+    sold = (
+        OrderItems.objects.filter(product=OuterRef("pk"))
+        .values("product")
+        .annotate(total=Sum("qty"))
+        .values("total")
+    )
+    return Product.objects.update(sales_count=Coalesce(Subquery(sold), 0))
+
+
+def sales_report(start: date, end: date, group_by: str = "day") -> list:
+    """
+    Sales between `start` and `end` (inclusive) read from the rollups, one row
+    per day or per product, grade or theme over the whole range.
+    """
+    if group_by == "day":
+        return list(
+            DailySales.objects.filter(date__range=(start, end))
+            .order_by("date")
+            .values(
+                "date",
+                "orders_count",
+                "units_sold",
+                "revenue",
+                "payments_count",
+                "amount_paid",
+            )
+        )
+
+    model, key, name = {
+        "product": (DailyProductSales, "product_id", "product__name"),
+        "grade": (DailyGradeSales, "grade_id", "grade__name"),
+        "theme": (DailyThemeSales, "theme_id", "theme__name"),
+    }[group_by]
+    rows = (
+        model.objects.filter(date__range=(start, end))
+        .values(key, name)
+        .annotate(
+            total_orders=Sum("orders_count"),
+            total_units=Sum("units_sold"),
+            total_revenue=Sum("revenue"),
+        )
+        .order_by("-total_revenue", name)
+    )
+    return [
+        {
+            "id": row[key],
+            "name": row[name],
+            "orders_count": row["total_orders"],
+            "units_sold": row["total_units"],
+            "revenue": row["total_revenue"],
+        }
+        for row in rows
+    ]
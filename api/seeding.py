@@ -0,0 +1,307 @@
+import itertools
+import random
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from .models import (
+    Colleague,
+    Color,
+    Dimension,
+    FrameType,
+    Order,
+    OrderItems,
+    OrderPaymentStatus,
+    OrderStatus,
+    PaymentInfo,
+    PaymentMethod,
+    Product,
+    ProductGrade,
+    ProductType,
+    ShippingInfo,
+    ThoughtTheme,
+)
+
+PRODUCT_GRADES = ["Essential", "Classic", "Premium", "Signature"]
+PRODUCT_TYPES = ["Frame", "Other Merch"]
+THOUGHT_THEMES = [
+    "Self-Discovery",
+    "Gratitude",
+    "Resilience",
+    "Love",
+    "Faith",
+    "Ambition",
+    "Rest",
+    "Friendship",
+]
+COLORS = ["Black", "White", "Oak", "Walnut", "Gold", "Silver"]
+FRAME_TYPES = ["Wood", "Metal", "Acrylic"]
+DIMENSIONS = [(8, 10), (11, 14), (12, 16), (16, 20), (18, 24)]
+ORDER_STATUSES = ["In Queue", "Processing", "Shipped", "Delivered"]
+PAYMENT_STATUSES = ["Default Status", "Partially Paid", "Paid"]
+PAYMENT_METHODS = ["Card", "Mobile Money", "Bank Transfer"]
+
+SEED_PASSWORD = "seeded-password"
+
+
+def seed_lookups() -> dict:
+    """
+    Create (or reuse) the lookup rows products and orders point at.
+    """
+
+    def get_or_create_all(model, names):
+        return [model.objects.get_or_create(name=name)[0] for name in names]
+
+    return {
+        "grades": get_or_create_all(ProductGrade, PRODUCT_GRADES),
+        "types": get_or_create_all(ProductType, PRODUCT_TYPES),
+        "themes": get_or_create_all(ThoughtTheme, THOUGHT_THEMES),
+        "colors": get_or_create_all(Color, COLORS),
+        "frame_types": get_or_create_all(FrameType, FRAME_TYPES),
+        "sizes": [
+            Dimension.objects.get_or_create(width=width, height=height)[0]
+            for width, height in DIMENSIONS
+        ],
+        "order_statuses": get_or_create_all(OrderStatus, ORDER_STATUSES),
+        "payment_statuses": get_or_create_all(OrderPaymentStatus, PAYMENT_STATUSES),
+        "payment_methods": get_or_create_all(PaymentMethod, PAYMENT_METHODS),
+    }
+
+
+def build_products(
+    rng: random.Random, count: int, lookups: dict, start: int = 0
+) -> list:
+    """
+    Unsaved products. Grades are skewed towards the cheaper ones
+    and prices follow the grade, as in the real catalog.
+    """
+    products = []
+    for n in range(start, start + count):
+        grade_index = min(int(rng.expovariate(1.0)), len(lookups["grades"]) - 1)
+        base_price = 20 + grade_index * 40
+        products.append(
+            Product(
+                name=f"{rng.choice(THOUGHT_THEMES)} Frame {n}",
+                product_type=rng.choice(lookups["types"]),
+                grade=lookups["grades"][grade_index],
+                weight=Decimal(rng.randint(20, 400)) / 100,
+                unit_price=Decimal(base_price + rng.randint(0, 3999) / 100).quantize(
+                    Decimal("0.01")
+                ),
+                qty=rng.randint(0, 200),
+                description="Seeded product",
+                discount=Decimal(rng.choice([0, 0, 0, 5, 10, 15])),
+            )
+        )
+    for product in products:
+        # bulk_create does not call save(), which keeps it up to date
+        product.effective_price = product.calculate_effective_price()
+    return products
+
+
+def build_product_links(rng: random.Random, products: list, lookups: dict) -> dict:
+    """
+    Unsaved through table rows for the product many to many fields.
+    """
+    links = {"themes": [], "sizes": [], "colors": [], "frame_types": []}
+    related_field = {
+        "themes": "thoughttheme",
+        "sizes": "dimension",
+        "colors": "color",
+        "frame_types": "frametype",
+    }
+    for product in products:
+        for field, rows in links.items():
+            through = getattr(Product, field).through
+            for related in rng.sample(lookups[field], rng.randint(1, 3)):
+                rows.append(
+                    through(product_id=product.id, **{related_field[field]: related})
+                )
+    return links
+
+
+def build_colleagues(
+    rng: random.Random,
+    count: int,
+    prefix: str = "seed",
+    start: int = 0,
+    password: str | None = None,
+) -> list:
+    # hashing once keeps seeding fast, every colleague shares SEED_PASSWORD
+    password = password or make_password(SEED_PASSWORD)
+    return [
+        Colleague(
+            email=f"{prefix}-{n}-{rng.randrange(10**8)}@seed.verbs.com",
+            password=password,
+            first_name=f"Seed{n}",
+            last_name="Colleague",
+            is_account_confirmed=True,
+        )
+        for n in range(start, start + count)
+    ]
+
+
+def popularity_weights(count: int) -> list:
+    """
+    Cumulative Zipf weights, the first products are the best sellers.
+    Passing them as cum_weights keeps each random pick O(log n).
+    """
+    return list(itertools.accumulate(1 / (rank + 1) for rank in range(count)))
+
+
+def build_orders(
+    rng: random.Random,
+    count: int,
+    products: list,
+    colleagues: list,
+    lookups: dict,
+    seed: int = 0,
+    start: int = 0,
+    product_weights: list | None = None,
+) -> dict:
+    """
+    Unsaved orders with their items, shipping info and payments.
+    Popular products are ordered more often, a minority of colleagues place
+    most of the orders and most orders are paid. Order numbers are derived
+    from `seed` and the order index so separately built chunks never collide.
+    """
+    orders, items, shipping, payments = [], [], [], []
+    now = timezone.now()
+    product_weights = product_weights or popularity_weights(len(products))
+    for n in range(start, start + count):
+        colleague = None
+        if colleagues and rng.random() < 0.8:
+            colleague = colleagues[int(len(colleagues) * rng.random() ** 2)]
+        order = Order(
+            order_number=f"{seed:03x}{n:09x}",
+            # spread over the last year
+            order_date=now - timedelta(seconds=rng.randrange(365 * 24 * 3600)),
+            added_by=colleague,
+            first_name=colleague.first_name if colleague else "Walk In",
+            last_name=colleague.last_name if colleague else "Customer",
+            email=colleague.email if colleague else "walkin@seed.verbs.com",
+            status=rng.choice(lookups["order_statuses"]),
+            payment_status=rng.choice(lookups["payment_statuses"]),
+            shipping_cost=Decimal("0.00"),
+        )
+        total_items_cost = Decimal("0.00")
+        ordered = rng.choices(
+            products, cum_weights=product_weights, k=rng.randint(1, 4)
+        )
+        distinct_products = {product.id: product for product in ordered}
+        for product in distinct_products.values():
+            qty = rng.randint(1, 3)
+            product_order_cost = product.unit_price * qty
+            total_items_cost += product_order_cost
+            items.append(
+                OrderItems(
+                    order=order,
+                    product=product,
+                    qty=qty,
+                    discount=product.discount,
+                    product_order_cost=product_order_cost,
+                    total_cost=product_order_cost - product.discount,
+                )
+            )
+        order.total_items_count = len(distinct_products)
+        order.total_items_cost = total_items_cost
+        order.total_order_cost = total_items_cost
+        orders.append(order)
+        shipping.append(
+            ShippingInfo(order=order, shipping_address=f"{rng.randint(1, 99)} Seed Street")
+        )
+        if order.payment_status.name != "Default Status":
+            payments.append(
+                PaymentInfo(
+                    order=order,
+                    payment_method=rng.choice(lookups["payment_methods"]),
+                    transaction_id=f"seed-{order.order_number}",
+                    amount_paid=total_items_cost,
+                )
+            )
+    return {"orders": orders, "items": items, "shipping": shipping, "payments": payments}
+
+
+def insert_orders(order_rows: dict, batch_size: int = 1000):
+    Order.objects.bulk_create(order_rows["orders"], batch_size=batch_size)
+    OrderItems.objects.bulk_create(order_rows["items"], batch_size=batch_size)
+    ShippingInfo.objects.bulk_create(order_rows["shipping"], batch_size=batch_size)
+    PaymentInfo.objects.bulk_create(order_rows["payments"], batch_size=batch_size)
+
+
+def load_order_dependencies() -> tuple:
+    """
+    Lookups, products, colleagues and product weights for seed_order_chunk,
+    loading only the columns build_orders reads.
+    """
+    lookups = seed_lookups()
+    products = list(
+        Product.objects.order_by("added_at", "id").only("id", "unit_price", "discount")
+    )
+    colleagues = list(
+        Colleague.objects.filter(email__endswith="@seed.verbs.com").only(
+            "id", "email", "first_name", "last_name"
+        )
+    )
+    return lookups, products, colleagues, popularity_weights(len(products))
+
+
+def seed_order_chunk(
+    seed: int, start: int, count: int, dependencies: tuple, batch_size: int = 1000
+) -> dict:
+    """
+    Build and insert orders `start` to `start + count` in one transaction.
+    Every chunk has its own random stream, so chunks can run in any order
+    and in separate processes.
+    """
+    lookups, products, colleagues, product_weights = dependencies
+    rng = random.Random(f"{seed}-{start}")
+    order_rows = build_orders(
+        rng, count, products, colleagues, lookups, seed, start, product_weights
+    )
+    with transaction.atomic():
+        insert_orders(order_rows, batch_size)
+    return {
+        "orders": len(order_rows["orders"]),
+        "order_items": len(order_rows["items"]),
+        "payments": len(order_rows["payments"]),
+    }
+
+
+def seed_load_fixtures(
+    products: int = 200,
+    colleagues: int = 50,
+    orders: int = 500,
+    seed: int = 42,
+    batch_size: int = 1000,
+) -> dict:
+    """
+    Fill the database with a reproducible catalog, colleagues and orders.
+    Returns the number of rows created per model.
+    """
+    rng = random.Random(seed)
+    with transaction.atomic():
+        lookups = seed_lookups()
+        product_rows = build_products(rng, products, lookups)
+        Product.objects.bulk_create(product_rows, batch_size=batch_size)
+        for field, rows in build_product_links(rng, product_rows, lookups).items():
+            getattr(Product, field).through.objects.bulk_create(
+                rows, batch_size=batch_size
+            )
+
+        colleague_rows = build_colleagues(rng, colleagues, prefix=f"seed{seed}")
+        Colleague.objects.bulk_create(colleague_rows, batch_size=batch_size)
+
+        order_rows = build_orders(
+            rng, orders, product_rows, colleague_rows, lookups, seed
+        )
+        insert_orders(order_rows, batch_size)
+
+    return {
+        "products": len(product_rows),
+        "colleagues": len(colleague_rows),
+        "orders": len(order_rows["orders"]),
+        "order_items": len(order_rows["items"]),
+        "payments": len(order_rows["payments"]),
+    }
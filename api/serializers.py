@@ -1,6 +1,7 @@
 import datetime
 from django.core.mail import EmailMessage, BadHeaderError
 from django.db import transaction, IntegrityError
+from django.utils import timezone
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import exceptions
 from rest_framework import serializers
@@ -32,17 +33,24 @@ from helpers.system_variables import (
     SENDER_EMAIL,
 )
 from helpers.generators import (
+    generate_order_number,
     generate_order_taxes,
     generate_reset_password_token,
     generate_shipping_cost,
     generate_registration_code,
 )
+from helpers.emails import registration_confirmation_email, reset_password_email
+from .promo_codes import redeem_promo_code, resolve_promo_code
 from helpers.defaults import (
     product_type_default,
     product_grade_default,
     product_color_default,
     default_payment_status,
     default_confirmation_code_status,
+    LOW_STOCK_THRESHOLD,
+    ORDER_EVENT_PAGE_SIZE,
+    ORDER_EVENT_MAX_WAIT_SECONDS,
+    ORDER_NUMBER_ATTEMPTS,
 )
 
 
@@ -71,23 +79,7 @@ class CreateColleagueSerializer(serializers.ModelSerializer):
                 f"An error occured creating colleague account {e}"
             )
         else:
-            email_body = f"""
-                Hi {colleague.first_name},
-                Complete your registration with this one-time security code:
-                {confirmation_code}
-                
-                Ignore this message if you have not registered with us.
-
-                Thank you,
-                Verbs Team.
-            """
-
-            email = EmailMessage(
-                subject="Confirm your registration",
-                body=email_body,
-                from_email=SENDER_EMAIL,
-                to=[colleague.email],
-            )
+            email = registration_confirmation_email(colleague, confirmation_code)
             try:
                 email.send()
             except Exception as email_error:
@@ -104,6 +96,15 @@ class CreateColleagueSerializer(serializers.ModelSerializer):
     #     return data
 
 
+class AsyncCreateColleagueSerializer(CreateColleagueSerializer):
+    """
+    Validates registrations without database queries,
+    the async view checks that the email is not taken.
+    """
+
+    email = serializers.EmailField(max_length=255)
+
+
 class ColleagueSerializer(serializers.ModelSerializer):
     class Meta:
         model = Colleague
@@ -139,12 +140,7 @@ class ResetPasswordSerializer(serializers.ModelSerializer):
                 email=email,
                 token=token,
             )
-            email = EmailMessage(
-                subject="Password reset link",
-                body=f"Follow the link to reset your password http://localhost:8000/reset?token={token}. Token expires after 1 hour.",
-                from_email="oforimensahebenezer07@gmail.com",
-                to=["quameophory@yahoo.com"],
-            )
+            email = reset_password_email(token)
             email.send()
         except BadHeaderError:
             print("Couldn't send email. Invalid header found.")
@@ -283,14 +279,25 @@ class ProductReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductReview
         fields = ["id", "added_at", "message", "user"]
-        read_only_fields = ["id"]
+        read_only_fields = ["id", "added_at", "user"]
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    # product updates keep the images they list by id, see ProductSerializer
+    id = serializers.UUIDField(required=False)
+    photo = serializers.ImageField(required=False)
+
     class Meta:
         model = ProductImage
         fields = ["id", "photo", "description"]
-        read_only_fields = ["id"]
+
+    def validate(self, attrs):
+        if not attrs.get("id") and not attrs.get("photo"):
+            raise serializers.ValidationError(
+                {"photo": "A photo is required for a new image."},
+                code=status.HTTP_400_BAD_REQUEST,
+            )
+        return attrs
 
 
 class ColorSerializer(serializers.ModelSerializer):
@@ -362,6 +369,7 @@ class ProductListSerializer(serializers.HyperlinkedModelSerializer):
             "images",
             "sizes",
             "unit_price",
+            "effective_price",
         ]
 
 
@@ -370,7 +378,6 @@ class ProductDetailSerializer(serializers.HyperlinkedModelSerializer):
     grade = ProductGradeSerializer(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
     # product_dimensions = ProductDimensionSerializer(many=True, read_only=True)
-    reviews = ProductReviewSerializer(many=True, read_only=True)
     themes = ThoughtThemeSerializer(many=True, read_only=True)
 
     class Meta:
@@ -385,7 +392,8 @@ class ProductDetailSerializer(serializers.HyperlinkedModelSerializer):
             "images",
             "description",
             "specifications",
-            "reviews",
+            "review_count",
+            "latest_review_at",
         ]
 
 
@@ -403,7 +411,6 @@ class ProductSerializer(serializers.ModelSerializer):
     product_type = ProductTypeSerializer()
     grade = ProductGradeSerializer()
     images = ProductImageSerializer(many=True)
-    reviews = ProductReviewSerializer(many=True, read_only=True)
     themes = ThoughtThemeSerializer(many=True)
     colors = ColorSerializer(many=True)
     frame_types = FrameTypeSerializer(many=True)
@@ -422,13 +429,25 @@ class ProductSerializer(serializers.ModelSerializer):
             "colors",
             "frame_types",
             "unit_price",
+            "effective_price",
             "qty",
             "description",
             "images",
             "return_policy",
-            "reviews",
+            # reviews are paginated at /api/products/<id>/reviews/
+            "review_count",
+            "latest_review_at",
         ]
-        read_only_fields = ["id"]
+        read_only_fields = ["id", "review_count", "latest_review_at"]
+
+    def validate_images(self, images: list):
+        # ids refer to images the product already has, a new one has none
+        if self.instance is None and any(image.get("id") for image in images):
+            raise serializers.ValidationError(
+                "A new product cannot keep images by id.",
+                code=status.HTTP_400_BAD_REQUEST,
+            )
+        return images
 
     def create(self, validated_data: dict):
         self.default_type, _ = ProductType.objects.get_or_create(name="Default Type")
@@ -478,115 +497,137 @@ class ProductSerializer(serializers.ModelSerializer):
             return product
 
     def update(self, instance, validated_data):
-        product_type_data = validated_data.pop("product_type", {})
-        grade_data = validated_data.pop("grade", {})
-        themes_data = validated_data.pop("themes", [])
-        images_data = validated_data.pop("images", [])
-        sizes_data = validated_data.pop("sizes", [])
-        colors_data = validated_data.pop("colors", [])
-        frame_types_data = validated_data.pop("frame_types", [])
-
-        product_type = None
-        if not product_type_data:
-            product_type = self.default_type
-        else:
-            try:
-                product_type = ProductType.objects.get(id=product_type_data.get("id"))
-            except ProductType.DoesNotExist:
-                raise serializers.ValidationError(
-                    "Product type does not exist", code=status.HTTP_400_BAD_REQUEST
-                )
+        """
+        Change only the supplied fields. Relations and images are diffed
+        against what the product has, so only the rows that changed are
+        inserted or deleted.
+        """
+        links = {
+            field: validated_data.pop(field)
+            for field in PRODUCT_LINK_FIELDS
+            if field in validated_data
+        }
+        images_data = validated_data.pop("images", None)
 
-        grade = None
-        if not grade_data:
-            grade = self.default_grade
-        else:
-            try:
-                grade = ProductGrade.objects.get(id=grade_data.get("id"))
-            except ProductGrade.DoesNotExist:
-                raise serializers.ValidationError(
-                    "Product grade does not exist", code=status.HTTP_400_BAD_REQUEST
-                )
         with transaction.atomic():
-            request = self.context.get("request")
-            user = request.user if request else None
-            instance.name = validated_data.get("name", instance.name)
-            instance.grade = grade or instance.grade
-            instance.product_type = product_type or instance.product_type
-
-            thought_themes = []
-            if not themes_data:
-                thought_themes.append(self.default_theme)
-            else:
-                try:
-                    thought_themes = [
-                        ThoughtTheme.objects.get(id=theme_data.get("id"))
-                        for theme_data in themes_data
-                    ]
-                except ThoughtTheme.DoesNotExist:
-                    raise serializers.ValidationError(
-                        "A theme key does not exist", code=status.HTTP_400_BAD_REQUEST
-                    )
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            if validated_data:
+                instance.save(update_fields=list(validated_data))
+
+            for field, related in links.items():
+                if not related and field in PRODUCT_LINK_DEFAULTS:
+                    model, defaults = PRODUCT_LINK_DEFAULTS[field]
+                    related = [model.objects.get_or_create(**defaults)[0]]
+                update_product_links(instance, field, related)
+
+            if images_data is not None:
+                update_product_images(instance, images_data)
+            return instance
 
-            instance.themes.set(thought_themes)
 
-            sizes = []
-            if sizes_data:
-                try:
-                    sizes = [
-                        Dimension.objects.get(id=size_data.get("id"))
-                        for size_data in sizes_data
-                    ]
-                except Dimension.DoesNotExist:
-                    raise serializers.ValidationError(
-                        "A selected dimension does not exist",
-                        code=status.HTTP_400_BAD_REQUEST,
-                    )
-            instance.sizes.set(sizes)
-
-            colors = []
-            if colors_data:
-                try:
-                    colors = [
-                        Color.objects.get(id=color_data.get("id"))
-                        for color_data in colors_data
-                    ]
-                except Color.DoesNotExist:
-                    raise serializers.ValidationError(
-                        "A selected color does not exist",
-                        code=status.HTTP_400_BAD_REQUEST,
-                    )
-            else:
-                colors.append(self.default_color)
-
-            instance.colors.set(colors)
-
-            frame_types = []
-            if frame_types_data:
-                try:
-                    frame_types = [
-                        FrameType.objects.get(id=frame_type_data.get("id"))
-                        for frame_type_data in frame_types_data
-                    ]
-                except FrameType.DoesNotExist:
-                    raise serializers.ValidationError(
-                        "A selected frame type does not exist",
-                        code=status.HTTP_400_BAD_REQUEST,
-                    )
-            else:
-                frame_types.append(self.default_frame_type)
-            instance.frame_types.set(frame_types)
+PRODUCT_LINK_FIELDS = ["themes", "sizes", "colors", "frame_types"]
+
+# the fields merchandising can change in bulk
+PRODUCT_STOCK_FIELDS = ["unit_price", "discount", "qty"]
+
+# what an update that empties one of these relations links instead
+PRODUCT_LINK_DEFAULTS = {
+    "themes": (ThoughtTheme, {"name": "Default Theme"}),
+    "colors": (Color, {"name": "Default Color", "defaults": {"code": "default"}}),
+    "frame_types": (FrameType, {"name": "Default Type"}),
+}
+
+
+def update_product_links(product: Product, field: str, related: list):
+    """
+    Make `related` the rows linked to `product` through the many to many
+    `field`, with at most one select, one delete and one insert.
+    """
+    manager = getattr(product, field)
+    through = manager.through
+    # the through table column pointing at the related model
+    column = manager.target_field_name + "_id"
+    links = through.objects.filter(**{manager.source_field_name: product})
+    wanted = {obj.pk for obj in related}
+    current = set(links.values_list(column, flat=True))
+    if current - wanted:
+        links.filter(**{f"{column}__in": current - wanted}).delete()
+    if wanted - current:
+        through.objects.bulk_create(
+            [
+                through(**{manager.source_field_name: product, column: pk})
+                for pk in wanted - current
+            ]
+        )
 
-            ProductImage.objects.bulk_create(
-                [
-                    ProductImage(product=instance, **image_data)
-                    for image_data in images_data
-                ]
+
+def update_product_images(product: Product, images_data: list):
+    """
+    Keep the images listed by id, updating the ones whose photo or
+    description changed, add the ones without an id and delete the rest.
+    """
+    current = {image.id: image for image in product.images.all()}
+    kept, described, added = set(), [], []
+    for image_data in images_data:
+        image_id = image_data.pop("id", None)
+        if image_id is None:
+            added.append(ProductImage(product=product, **image_data))
+            continue
+        image = current.get(image_id)
+        if image is None:
+            raise serializers.ValidationError(
+                {"images": f"Image {image_id} does not belong to this product."},
+                code=status.HTTP_400_BAD_REQUEST,
             )
-            instance.description = validated_data.get("description", "")
-            instance.added_by = user
-            instance.save()
-            return instance
+        kept.add(image.id)
+        if "photo" in image_data:
+            # a new upload has to go through save() to reach the storage
+            image.photo = image_data["photo"]
+            image.description = image_data.get("description", image.description)
+            image.save()
+        elif image_data.get("description", image.description) != image.description:
+            image.description = image_data["description"]
+            described.append(image)
+    if current.keys() - kept:
+        ProductImage.objects.filter(pk__in=current.keys() - kept).delete()
+    if described:
+        ProductImage.objects.bulk_update(described, ["description"])
+    if added:
+        ProductImage.objects.bulk_create(added)
+
+
+class ProductStockPatchListSerializer(serializers.ListSerializer):
+    def validate(self, patches: list):
+        ids = [patch["id"] for patch in patches]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError(
+                "Each product can only be patched once per request.",
+                code=status.HTTP_400_BAD_REQUEST,
+            )
+        return patches
+
+
+class ProductStockPatchSerializer(serializers.ModelSerializer):
+    """
+    One entry of a bulk price and stock update.
+    """
+
+    id = serializers.UUIDField()
+
+    class Meta:
+        model = Product
+        fields = ["id"] + PRODUCT_STOCK_FIELDS
+        extra_kwargs = {field: {"required": False} for field in PRODUCT_STOCK_FIELDS}
+        list_serializer_class = ProductStockPatchListSerializer
+
+    def validate(self, attrs):
+        if len(attrs) == 1:
+            raise serializers.ValidationError(
+                f"Supply at least one of {', '.join(PRODUCT_STOCK_FIELDS)}.",
+                code=status.HTTP_400_BAD_REQUEST,
+            )
+        return attrs
 
 
 class OrderStatusSerializer(serializers.ModelSerializer):
@@ -632,6 +673,32 @@ class OrderListSerializer(serializers.HyperlinkedModelSerializer):
         ]
 
 
+class OrderSummarySerializer(serializers.HyperlinkedModelSerializer):
+    """
+    The columns a colleague's order history shows, see MyOrderList.
+    """
+
+    status = serializers.SlugRelatedField(slug_field="name", read_only=True)
+    payment_status = serializers.SlugRelatedField(slug_field="name", read_only=True)
+    url = serializers.HyperlinkedIdentityField(
+        view_name="order-detail",
+        lookup_field="order_number",
+    )
+
+    class Meta:
+        model = Order
+        fields = [
+            "url",
+            "order_number",
+            "order_date",
+            "created_at",
+            "status",
+            "payment_status",
+            "total_items_count",
+            "total_order_cost",
+        ]
+
+
 class PromoCodeSerializer(serializers.ModelSerializer):
     code = serializers.CharField(allow_blank=True)
 
@@ -675,6 +742,17 @@ class PaymentInfoSerializer(serializers.ModelSerializer):
         fields = ["payment_method", "amount_paid", "transaction_id", "payment_date"]
 
 
+class AsyncPaymentInfoSerializer(PaymentInfoSerializer):
+    """
+    Validates payments without database queries,
+    a duplicate transaction id is rejected when the payment is saved.
+    """
+
+    transaction_id = serializers.CharField(
+        max_length=255, required=False, allow_null=True, allow_blank=True
+    )
+
+
 class OrderSerializer(serializers.ModelSerializer):
     promo_code = PromoCodeSerializer()
     items = OrderItemSerializer(many=True)
@@ -746,22 +824,33 @@ class OrderSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "No items have been selected", code=status.HTTP_400_BAD_REQUEST
             )
+        promo_code = resolve_promo_code((promo_code_data or {}).get("code"))
         try:
             with transaction.atomic():
                 # create order object
-                code = promo_code_data.get("code")
-                promo_code = PromoCode.objects.get(code=code) if code else None
                 # get default payment status
                 payment_status = default_payment_status()
                 shipping_cost = generate_shipping_cost()
                 total_items_count = len(order_items_data)
-                order = Order.objects.create(
+                order = Order(
                     promo_code=promo_code,
                     payment_status=payment_status,
                     shipping_cost=shipping_cost,
                     total_items_count=total_items_count,
                     **validated_data,
                 )
+                for attempt in range(ORDER_NUMBER_ATTEMPTS):
+                    try:
+                        with transaction.atomic():
+                            order.save(force_insert=True)
+                        break
+                    except IntegrityError:
+                        # a process on the same order number shard made the
+                        # number first, see helpers.generators
+                        taken = Order.objects.filter(order_number=order.order_number)
+                        if attempt + 1 == ORDER_NUMBER_ATTEMPTS or not taken.exists():
+                            raise
+                        order.order_number = generate_order_number()
                 # create related shipping information
                 ShippingInfo.objects.create(
                     # order=order, shipping_country=None, **shipping_info_data
@@ -804,8 +893,16 @@ class OrderSerializer(serializers.ModelSerializer):
                 total_order_cost = total_items_cost + order_tax - promo_code_value
                 print(f"order.total_items_cost: {order.total_items_cost}")
                 order.total_order_cost = total_order_cost
+                # last, to hold the promo code row for as short as possible
+                if promo_code and not redeem_promo_code(promo_code):
+                    raise serializers.ValidationError(
+                        "Promo code has been used up",
+                        code=status.HTTP_400_BAD_REQUEST,
+                    )
                 order.save()
             return order
+        except serializers.ValidationError:
+            raise
         except Exception as e:
             raise serializers.ValidationError(
                 f"Failed to create order {e}", code=status.HTTP_400_BAD_REQUEST
@@ -990,3 +1087,50 @@ class OrderDetailSerializer(serializers.ModelSerializer):
         order.tax = items_tax
         order.save()
         return order
+
+
+SALES_REPORT_GROUPS = ["day", "product", "grade", "theme"]
+REPORT_PERIODS = ["day", "week", "month"]
+
+
+class ReportQuerySerializer(serializers.Serializer):
+    """
+    Date range of a report, the last 30 days by default.
+    """
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data: dict):
+        data.setdefault("end", timezone.localdate())
+        data.setdefault("start", data["end"] - datetime.timedelta(days=29))
+        if data["start"] > data["end"]:
+            raise serializers.ValidationError(
+                "start must not be after end", code=status.HTTP_400_BAD_REQUEST
+            )
+        return data
+
+
+class SalesReportQuerySerializer(ReportQuerySerializer):
+    group_by = serializers.ChoiceField(choices=SALES_REPORT_GROUPS, default="day")
+
+
+class RevenueReportQuerySerializer(ReportQuerySerializer):
+    period = serializers.ChoiceField(choices=REPORT_PERIODS, default="day")
+
+
+class LowStockQuerySerializer(serializers.Serializer):
+    threshold = serializers.IntegerField(min_value=0, default=LOW_STOCK_THRESHOLD)
+    days = serializers.IntegerField(min_value=1, max_value=365, default=30)
+
+
+class OrderChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+    order_number = serializers.CharField(max_length=255, required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=500, default=ORDER_EVENT_PAGE_SIZE
+    )
+    # seconds to wait for the first event when there is none yet
+    wait = serializers.FloatField(
+        min_value=0, max_value=ORDER_EVENT_MAX_WAIT_SECONDS, default=0
+    )
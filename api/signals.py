@@ -0,0 +1,144 @@
+import copy
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from .authentication import invalidate_cached_colleague
+from .models import (
+    Colleague,
+    Order,
+    OrderItems,
+    PaymentInfo,
+    ProductReview,
+    PromoCode,
+)
+from .promo_codes import invalidate_promo_code
+from .reviews import forget_review, record_review
+from .vocabulary import VOCABULARY_MODELS, invalidate_vocabulary
+from .rollups import (
+    ROLLUP_RECORDERS,
+    move_rolled_up,
+    record_order,
+    record_order_item,
+    record_payment,
+    rolled_up_change,
+    track_rolled_up_fields,
+)
+from .events import (
+    order_saved_events,
+    record_order_event,
+    record_payment_event,
+    track_order_statuses,
+)
+
+
+@receiver([post_save, post_delete], sender=Colleague)
+def invalidate_colleague_cache(sender, instance, **kwargs):
+    invalidate_cached_colleague(instance.pk)
+
+
+@receiver(post_init, sender=PromoCode)
+def track_promo_code(sender, instance, **kwargs):
+    instance._loaded_code = instance.__dict__.get("code")
+
+
+@receiver([post_save, post_delete], sender=PromoCode)
+def invalidate_promo_code_cache(sender, instance, **kwargs):
+    # the code it was loaded with too, in case it was renamed
+    invalidate_promo_code(instance.code, getattr(instance, "_loaded_code", None))
+
+
+# new sales are added to the rollups after the order commits, which keeps the
+# busy daily rows locked only briefly, and so are updates, as the row they
+# replace taken out and the new one added. Deletions are taken out right
+# away, while the order and product they point at can still be read.
+
+
+def roll_up_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        # as saved, a later update in the transaction is counted by itself
+        saved = copy.copy(instance)
+        transaction.on_commit(lambda: ROLLUP_RECORDERS[sender](saved))
+    elif change := rolled_up_change(instance):
+        transaction.on_commit(lambda: move_rolled_up(*change))
+    track_rolled_up_fields(instance)
+
+
+def track_rolled_up(sender, instance, **kwargs):
+    track_rolled_up_fields(instance)
+
+
+for model in ROLLUP_RECORDERS:
+    post_init.connect(track_rolled_up, sender=model)
+    post_save.connect(roll_up_saved, sender=model)
+
+
+@receiver(pre_delete, sender=Order)
+def roll_back_order(sender, instance, **kwargs):
+    record_order(instance, sign=-1)
+
+
+@receiver(pre_delete, sender=OrderItems)
+def roll_back_order_item(sender, instance, **kwargs):
+    record_order_item(instance, sign=-1)
+
+
+@receiver(pre_delete, sender=PaymentInfo)
+def roll_back_payment(sender, instance, **kwargs):
+    record_payment(instance, sign=-1)
+
+
+# the order event log is written after commit too, so the change feed never
+# shows a change that was rolled back
+
+
+@receiver(post_init, sender=Order)
+def track_order(sender, instance, **kwargs):
+    track_order_statuses(instance)
+
+
+@receiver(post_save, sender=Order)
+def log_order_events(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    for event in order_saved_events(instance, created):
+        transaction.on_commit(
+            lambda event=event: record_order_event(instance, event)
+        )
+    track_order_statuses(instance)
+
+
+@receiver(post_save, sender=PaymentInfo)
+def log_payment_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: record_payment_event(instance))
+
+
+# the review summary of a product is updated in the transaction that adds or
+# deletes the review, so the count never drifts from the rows
+
+
+@receiver(post_save, sender=ProductReview)
+def summarize_review(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_review(instance)
+
+
+@receiver(post_delete, sender=ProductReview)
+def unsummarize_review(sender, instance, **kwargs):
+    forget_review(instance)
+
+
+# every process rebuilds its vocabulary snapshot after a lookup row changes
+
+
+def refresh_vocabulary(sender, raw=False, **kwargs):
+    # once the change is visible to the processes rebuilding their snapshot
+    if not raw:
+        transaction.on_commit(invalidate_vocabulary)
+
+
+for model in VOCABULARY_MODELS:
+    post_save.connect(refresh_vocabulary, sender=model)
+    post_delete.connect(refresh_vocabulary, sender=model)
@@ -0,0 +1,108 @@
+import logging
+import threading
+from datetime import timedelta
+from django.db import close_old_connections
+from django.utils import timezone
+from .models import Colleague, ResetPassword
+from helpers.defaults import TOKEN_EXPIRY_HOURS, TOKEN_SWEEP_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def _batched_pks(queryset, batch_size: int, max_batches: int | None):
+    """
+    Yield lists of at most `batch_size` primary keys from `queryset`
+    until it is exhausted or `max_batches` lists have been yielded.
+    """
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        pks = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks
+        batches += 1
+        if len(pks) < batch_size:
+            return
+
+
+def sweep_reset_password_tokens(
+    batch_size: int = TOKEN_SWEEP_BATCH_SIZE, max_batches: int | None = None
+) -> int:
+    """
+    Delete used, expired and stale reset password tokens.
+    Returns the number of deleted rows.
+    """
+    cutoff = timezone.now() - timedelta(hours=TOKEN_EXPIRY_HOURS)
+    # both lookups are range scans on the (status, created_at) index
+    stale_tokens = [
+        ResetPassword.objects.filter(status__in=["used", "expired"]),
+        ResetPassword.objects.filter(status="new", created_at__lt=cutoff),
+    ]
+    deleted = 0
+    for queryset in stale_tokens:
+        for pks in _batched_pks(queryset, batch_size, max_batches):
+            count, _ = ResetPassword.objects.filter(pk__in=pks).delete()
+            deleted += count
+    return deleted
+
+
+def sweep_confirmation_codes(
+    batch_size: int = TOKEN_SWEEP_BATCH_SIZE, max_batches: int | None = None
+) -> int:
+    """
+    Clear the confirmation codes of accounts that are already confirmed.
+    Returns the number of updated colleagues.
+    """
+    queryset = Colleague.objects.filter(
+        is_account_confirmed=True, confirmation_code__isnull=False
+    )
+    cleared = 0
+    for pks in _batched_pks(queryset, batch_size, max_batches):
+        cleared += Colleague.objects.filter(pk__in=pks).update(confirmation_code=None)
+    return cleared
+
+
+def sweep_expired_tokens(
+    batch_size: int = TOKEN_SWEEP_BATCH_SIZE, max_batches: int | None = None
+) -> dict:
+    return {
+        "reset_password_tokens": sweep_reset_password_tokens(batch_size, max_batches),
+        "confirmation_codes": sweep_confirmation_codes(batch_size, max_batches),
+    }
+
+
+class TokenSweeper(threading.Thread):
+    """
+    Daemon thread running `sweep_expired_tokens` every `interval` seconds.
+    """
+
+    def __init__(self, interval: int, batch_size: int = TOKEN_SWEEP_BATCH_SIZE):
+        super().__init__(name="token-sweeper", daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            close_old_connections()
+            try:
+                result = sweep_expired_tokens(self.batch_size)
+                logger.info("Swept expired tokens: %s", result)
+            except Exception as e:
+                logger.exception(f"Error sweeping expired tokens: {e}")
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+
+
+_sweeper = None
+
+
+def start_sweeper(interval: int, batch_size: int = TOKEN_SWEEP_BATCH_SIZE):
+    global _sweeper
+    if _sweeper is None or not _sweeper.is_alive():
+        _sweeper = TokenSweeper(interval, batch_size)
+        _sweeper.start()
+    return _sweeper
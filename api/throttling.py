@@ -0,0 +1,106 @@
+from rest_framework import throttling
+from rest_framework.settings import api_settings
+
+
+class WindowRateThrottle(throttling.SimpleRateThrottle):
+    """
+    Sliding window throttle shared by every worker through the Django cache.
+
+    Each client may make ``num_requests`` requests per ``duration``, counted
+    in fixed windows with the previous window weighted by how much of it
+    still overlaps the last ``duration`` seconds. Counters only change with
+    cache.incr and cache.decr, so parallel requests can't all take the last
+    slot. Budgets are looked up per endpoint in ``DEFAULT_THROTTLE_RATES``
+    under ``"<throttle_scope>_<key_kind>"``, e.g. ``"register_ip": "10/min"``.
+    Views without a ``throttle_scope`` (or scopes without a budget) are not
+    throttled.
+    """
+
+    key_kind = None
+
+    def __init__(self):
+        # rates are resolved per request in allow_request so that they follow
+        # the current settings instead of the ones loaded at import time
+        pass
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident_value(self, request):
+        raise NotImplementedError(".get_ident_value() must be overridden")
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def count(self, key: str, delta: int) -> int:
+        # a counter evicted between add and incr starts over
+        self.cache.add(key, 0, 2 * self.duration)
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:
+            self.cache.add(key, max(delta, 0), 2 * self.duration)
+            return max(delta, 0)
+
+    def allow_request(self, request, view):
+        view_scope = getattr(view, "throttle_scope", None)
+        if not view_scope:
+            return True
+
+        self.scope = f"{view_scope}_{self.key_kind}"
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        self.overlap = 1 - elapsed / self.duration
+        current_key = f"{self.key}:{int(window)}"
+        self.previous = self.cache.get(f"{self.key}:{int(window) - 1}", 0)
+        # the position of this request among those of the window
+        self.current = self.count(current_key, 1)
+        if self.previous * self.overlap + self.current <= self.num_requests:
+            return True
+        # refused requests don't use up the budget
+        self.current = self.count(current_key, -1)
+        return False
+
+    def wait(self):
+        """
+        Seconds until the count of the last ``duration`` seconds leaves room
+        for another request, assuming no other request is made meanwhile.
+        """
+        if not self.num_requests:
+            return None
+        room = self.num_requests - 1 - self.current
+        if room >= 0 and self.previous:
+            # as the previous window slides out
+            return max(0, (1 - room / self.previous) - (1 - self.overlap)) * self.duration
+        # the current window becomes the previous one first
+        rest = self.overlap * self.duration
+        return rest + max(0, 1 - (self.num_requests - 1) / self.current) * self.duration
+
+
+class IPRateThrottle(WindowRateThrottle):
+    key_kind = "ip"
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+
+class EmailRateThrottle(WindowRateThrottle):
+    key_kind = "email"
+
+    def get_ident_value(self, request):
+        # only the parsed request body is read here, no database lookup
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not email or not isinstance(email, str):
+            return None
+        return email.strip().lower()
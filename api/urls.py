@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework.urlpatterns import format_suffix_patterns
-from api import views
+from api import views, async_views
 
 urlpatterns = [
     path("register/", views.RegisterColleague.as_view(), name="register"),
@@ -13,15 +13,79 @@ urlpatterns = [
     ),
     path("users/", views.ColleagueList.as_view()),
     path("users/<uuid:pk>/", views.ColleagueDetail.as_view()),
+    path("vocabulary/", views.VocabularyView.as_view(), name="vocabulary"),
     path("products/", views.ProductList.as_view()),
     path("products/add/", views.ProductCreate.as_view(), name="create-product"),
+    path(
+        "products/bulk/", views.ProductBulkUpdate.as_view(), name="product-bulk-update"
+    ),
     path("products/<uuid:pk>/", views.ProductDetail.as_view(), name="product-detail"),
+    path(
+        "products/<uuid:pk>/reviews/",
+        views.ProductReviewList.as_view(),
+        name="product-reviews",
+    ),
     path("orders/", views.OrderList.as_view()),
+    path("me/orders/", views.MyOrderList.as_view(), name="my-orders"),
+    # before orders/<str:order_number>/ so these are not taken for an order
+    path(
+        "orders/changes/",
+        async_views.OrderChangeFeed.as_view(),
+        name="order-changes",
+    ),
+    path(
+        "orders/events/",
+        async_views.OrderEventStream.as_view(),
+        name="order-event-stream",
+    ),
     path("orders/add/", views.OrderCreate.as_view(), name="create-order"),
     path(
         "orders/<str:order_number>/", views.OrderDetail.as_view(), name="order-detail"
     ),
     path("orders/<str:order_number>/pay/", views.OrderPayment.as_view(), name="order-payment"),
+    path(
+        "orders/<str:order_number>/events/",
+        async_views.OrderEventStream.as_view(),
+        name="order-events",
+    ),
+    path("reports/sales/", views.SalesReportView.as_view(), name="sales-report"),
+    path(
+        "reports/top-sellers/",
+        views.TopSellersReportView.as_view(),
+        name="top-sellers-report",
+    ),
+    path("reports/revenue/", views.RevenueReportView.as_view(), name="revenue-report"),
+    path(
+        "reports/average-order-value/",
+        views.AverageOrderValueReportView.as_view(),
+        name="average-order-value-report",
+    ),
+    path(
+        "reports/promo-codes/",
+        views.PromoCodeUsageReportView.as_view(),
+        name="promo-code-usage-report",
+    ),
+    path(
+        "reports/low-stock/",
+        views.LowStockReportView.as_view(),
+        name="low-stock-report",
+    ),
+    # async variants of the I/O bound endpoints, serve them through verbs/asgi.py
+    path(
+        "async/register/",
+        async_views.AsyncRegisterColleague.as_view(),
+        name="async-register",
+    ),
+    path(
+        "async/reset-password/",
+        async_views.AsyncResetPasswordView.as_view(),
+        name="async-reset-password",
+    ),
+    path(
+        "async/orders/<str:order_number>/pay/",
+        async_views.AsyncOrderPayment.as_view(),
+        name="async-order-payment",
+    ),
     # path(
     #     "orders/<str:order_number>/edit/", views.OrderEdit.as_view(), name="order-edit"
     # ),
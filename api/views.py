@@ -2,6 +2,7 @@ import pytz
 from .models import (
     Colleague,
     Product,
+    ProductReview,
     ResetPassword,
     Order,
     PaymentInfo,
@@ -12,26 +13,59 @@ from .serializers import (
     ColleagueSerializer,
     ProductListSerializer,
     ProductSerializer,
+    ProductReviewSerializer,
+    ProductStockPatchSerializer,
     OrderSerializer,
     OrderDetailSerializer,
     OrderListSerializer,
+    OrderSummarySerializer,
     OrderEditSerializer,
     PaymentInfoSerializer,
     ResetPasswordSerializer,
     SetNewPasswordSerializer,
+    ReportQuerySerializer,
+    SalesReportQuerySerializer,
+    RevenueReportQuerySerializer,
+    LowStockQuerySerializer,
 )
 from rest_framework.response import Response
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework import permissions, exceptions, status
 from rest_framework.views import APIView
+from rest_framework.generics import get_object_or_404
+from rest_framework_simplejwt.views import TokenObtainPairView
 from datetime import datetime, timedelta
-from helpers.defaults import TOKEN_EXPIRY_HOURS
+from helpers.defaults import PRODUCT_BULK_UPDATE_MAX, TOKEN_EXPIRY_HOURS
 import django_filters
 from django_filters import rest_framework as filters
 import os
 import subprocess
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
+from django.utils.cache import patch_cache_control
+from .throttling import IPRateThrottle, EmailRateThrottle
+from .products import (
+    PRODUCT_DEFAULT_SORT,
+    PRODUCT_SORTS,
+    bulk_update_products,
+    catalog_version,
+    product_detail,
+)
+from .reviews import submit_review
+from .vocabulary import get_vocabulary
+from .rollups import sales_report
+from .pagination import (
+    OrderHistoryPagination,
+    ProductCatalogPagination,
+    ProductReviewPagination,
+    ReportPagination,
+)
+from . import reports
+from django.conf import settings
+from django.core.cache import cache
+from urllib.parse import urlencode
+
+AUTH_THROTTLE_CLASSES = [IPRateThrottle, EmailRateThrottle]
 
 
 # Create your views here.
@@ -40,9 +74,17 @@ from django.http import JsonResponse, HttpResponseBadRequest
 class RegisterColleague(generics.CreateAPIView):
     queryset = Colleague.objects.all()
     serializer_class = CreateColleagueSerializer
+    # no authentication so throttling runs before any database work
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "register"
 
 
 class ConfirmRegistrationView(APIView):
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "confirm_registration"
+
     def post(self, request, *args, **kwargs):
         SUCCESS_MESSAGE = "Account confirmed successfully."
         INVALID_CODE_MESSAGE = "Invalid confirmation code."
@@ -154,6 +196,14 @@ def is_token_expired(datetime_field, hours):
 class ResetPasswordView(generics.CreateAPIView):
     queryset = ResetPassword.objects.all()
     serializer_class = ResetPasswordSerializer
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "reset_password"
+
+
+class ThrottledTokenObtainPairView(TokenObtainPairView):
+    throttle_classes = AUTH_THROTTLE_CLASSES
+    throttle_scope = "login"
 
 
 class ResetPasswordTokenView(generics.GenericAPIView):
@@ -197,8 +247,34 @@ class ResetPasswordTokenView(generics.GenericAPIView):
             )
 
 
+class VocabularyView(APIView):
+    """
+    Every lookup the frontend builds dropdowns from, in one response served
+    from the snapshot of this process. Clients keep it for
+    VOCABULARY_MAX_AGE_SECONDS and then revalidate it with If-None-Match.
+    """
+
+    # public, skipping authentication keeps it to a cache read
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        snapshot = get_vocabulary()
+        if snapshot.etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(snapshot.body, content_type="application/json")
+        response["ETag"] = snapshot.etag
+        patch_cache_control(
+            response, public=True, max_age=settings.VOCABULARY_MAX_AGE_SECONDS
+        )
+        return response
+
+
 class ProductFilter(django_filters.FilterSet):
     unit_price = django_filters.RangeFilter()
+    # the discounted price, a range scan of product_effective_idx
+    effective_price = django_filters.RangeFilter()
 
     class Meta:
         model = Product
@@ -214,32 +290,132 @@ class ProductFilter(django_filters.FilterSet):
 
 
 class ProductList(generics.ListAPIView):
+    """
+    The catalog, sorted by `?sort=` (see PRODUCT_SORTS) and paginated
+    with a keyset cursor.
+    """
+
     serializer_class = ProductListSerializer
-    queryset = Product.objects.all()
     filter_backends = [filters.DjangoFilterBackend]
     filterset_class = ProductFilter
+    pagination_class = ProductCatalogPagination
+
+    def get_queryset(self):
+        sort = self.request.query_params.get("sort", PRODUCT_DEFAULT_SORT)
+        if sort not in PRODUCT_SORTS:
+            raise exceptions.ValidationError(
+                {"sort": [f"Choose one of {', '.join(PRODUCT_SORTS)}."]}
+            )
+        return Product.objects.order_by(*PRODUCT_SORTS[sort])
 
 
 class ProductCreate(generics.CreateAPIView):
     serializer_class = ProductSerializer
     queryset = Product.objects.all()
     permission_classes = [permissions.IsAuthenticated]
+    # the product is saved with added_by=request.user
+    jwt_full_user = True
 
 
 class ProductDetail(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProductSerializer
     queryset = Product.objects.all()
 
+    def retrieve(self, request, *args, **kwargs):
+        # reads skip the nested writable serializers, see api.products
+        data = product_detail(kwargs["pk"], request)
+        if data is None:
+            raise exceptions.NotFound()
+        return Response(data)
+
+
+class ProductBulkUpdate(APIView):
+    """
+    Reprice and restock many products at once from a list of
+    `{id, unit_price, discount, qty}` patches, applied in one transaction.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def patch(self, request, *args, **kwargs):
+        serializer = ProductStockPatchSerializer(
+            data=request.data, many=True, max_length=PRODUCT_BULK_UPDATE_MAX
+        )
+        serializer.is_valid(raise_exception=True)
+        updated = bulk_update_products(serializer.validated_data)
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+
+class ProductReviewList(generics.ListCreateAPIView):
+    """
+    The reviews of a product, newest first. Submitted reviews are saved in
+    batches, so they are accepted with a 202 and listed shortly after.
+    """
+
+    serializer_class = ProductReviewSerializer
+    pagination_class = ProductReviewPagination
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get_product(self):
+        return get_object_or_404(Product.objects.only("id"), pk=self.kwargs["pk"])
+
+    def get_queryset(self):
+        return ProductReview.objects.filter(product=self.get_product())
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # request.user.id also works for the cached TokenColleague
+        review = ProductReview(
+            product=self.get_product(),
+            user_id=request.user.id,
+            **serializer.validated_data,
+        )
+        submit_review(review)
+        serializer.instance = review
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
 
 class OrderList(generics.ListAPIView):
     serializer_class = OrderListSerializer
     queryset = Order.objects.all()
 
 
+class MyOrderList(generics.ListAPIView):
+    """
+    The authenticated colleague's orders, newest first.
+    """
+
+    serializer_class = OrderSummarySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OrderHistoryPagination
+
+    def get_queryset(self):
+        # request.user.id also works for the cached TokenColleague
+        return (
+            Order.objects.filter(added_by_id=self.request.user.id)
+            .select_related("status", "payment_status")
+            .only(
+                "order_number",
+                "order_date",
+                "created_at",
+                "status__name",
+                "payment_status__name",
+                "total_items_count",
+                "total_order_cost",
+            )
+        )
+
+
 class OrderCreate(generics.CreateAPIView):
     serializer_class = OrderSerializer
     queryset = Order.objects.all()
 
+    def perform_create(self, serializer):
+        # by id, request.user may be a TokenColleague which can't be assigned
+        added_by_id = self.request.user.id if self.request.user.is_authenticated else None
+        serializer.save(added_by_id=added_by_id)
+
 
 class OrderDetail(generics.RetrieveDestroyAPIView):
     serializer_class = OrderSerializer
@@ -252,6 +428,89 @@ class OrderPayment(generics.CreateAPIView):
     serializer_class = PaymentInfoSerializer
     queryset = PaymentInfo.objects.all()
 
+    def perform_create(self, serializer):
+        order = get_object_or_404(Order, order_number=self.kwargs["order_number"])
+        serializer.save(order=order)
+
+
+class ReportView(generics.GenericAPIView):
+    """
+    Base for the staff reports. Query parameters are validated with
+    `query_serializer_class` and the response is cached per parameter set.
+    `get_report` returns a queryset, which is paginated, or a dict.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = ReportPagination
+    query_serializer_class = ReportQuerySerializer
+    # reports read from the products are dropped when the catalog changes
+    depends_on_catalog = False
+
+    def get_report(self, **params):
+        raise NotImplementedError(".get_report() must be overridden")
+
+    def get_cache_key(self, request) -> str:
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        if self.depends_on_catalog:
+            return f"report:{request.path}:{catalog_version()}:{params}"
+        return f"report:{request.path}:{params}"
+
+    def get(self, request, *args, **kwargs):
+        cache_key = self.get_cache_key(request)
+        data = cache.get(cache_key)
+        if data is None:
+            query = self.query_serializer_class(data=request.query_params)
+            query.is_valid(raise_exception=True)
+            report = self.get_report(**query.validated_data)
+            if not isinstance(report, dict):
+                report = self.get_paginated_response(
+                    self.paginate_queryset(report)
+                ).data
+            data = {**query.data, **report}
+            cache.set(cache_key, data, settings.REPORT_CACHE_SECONDS)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SalesReportView(ReportView):
+    """
+    Revenue by day, product, grade or theme, answered from the daily rollups.
+    """
+
+    query_serializer_class = SalesReportQuerySerializer
+
+    def get_report(self, **params):
+        return {"results": sales_report(**params)}
+
+
+class TopSellersReportView(ReportView):
+    def get_report(self, **params):
+        return reports.top_sellers(**params)
+
+
+class RevenueReportView(ReportView):
+    query_serializer_class = RevenueReportQuerySerializer
+
+    def get_report(self, **params):
+        return reports.revenue_by_period(**params)
+
+
+class AverageOrderValueReportView(ReportView):
+    def get_report(self, **params):
+        return reports.average_order_value(**params)
+
+
+class PromoCodeUsageReportView(ReportView):
+    def get_report(self, **params):
+        return reports.promo_code_usage(**params)
+
+
+class LowStockReportView(ReportView):
+    query_serializer_class = LowStockQuerySerializer
+    depends_on_catalog = True
+
+    def get_report(self, **params):
+        return reports.low_stock_products(**params)
+
 
 # class OrderEdit(generics.UpdateAPIView):
 #     serializer_class = OrderEditSerializer
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import threading
+import time
+import uuid
+from django.core.cache import cache
+from rest_framework.utils.encoders import JSONEncoder
+from .models import (
+    Color,
+    Dimension,
+    FrameType,
+    PaymentMethod,
+    ProductGrade,
+    ProductType,
+    ThoughtTheme,
+)
+from helpers.defaults import VOCABULARY_SNAPSHOT_SECONDS
+
+# the lookups the frontend builds its dropdowns from, key: (model, fields, ordering)
+VOCABULARY = {
+    "product_types": (ProductType, ["id", "name"], ["name"]),
+    "grades": (ProductGrade, ["id", "name"], ["name"]),
+    "themes": (ThoughtTheme, ["id", "name"], ["name"]),
+    "colors": (Color, ["id", "name", "code"], ["name"]),
+    "frame_types": (FrameType, ["id", "name"], ["name"]),
+    "sizes": (Dimension, ["id", "width", "height"], ["width", "height"]),
+    "payment_methods": (PaymentMethod, ["id", "name"], ["name"]),
+}
+
+VOCABULARY_MODELS = [model for model, _, _ in VOCABULARY.values()]
+
+# replaced on every change, tells each process its snapshot is out of date
+VOCABULARY_VERSION_KEY = "vocabulary:version"
+
+
+class VocabularySnapshot:
+    def __init__(self, version: str, body: bytes):
+        self.version = version
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.expires_at = time.monotonic() + VOCABULARY_SNAPSHOT_SECONDS
+
+    def is_current(self, version: str) -> bool:
+        return self.version == version and time.monotonic() < self.expires_at
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def build_vocabulary() -> dict:
+    return {
+        key: list(model.objects.order_by(*ordering).values(*fields))
+        for key, (model, fields, ordering) in VOCABULARY.items()
+    }
+
+
+def get_vocabulary() -> VocabularySnapshot:
+    """
+    The rendered vocabulary of this process, rebuilt when another change
+    was recorded under VOCABULARY_VERSION_KEY since it was built, and at
+    least every VOCABULARY_SNAPSHOT_SECONDS. The ETag only changes with the
+    content, so clients keep getting 304s across rebuilds.
+    """
+    global _snapshot
+    version = cache.get_or_set(VOCABULARY_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.is_current(version):
+        return snapshot
+    with _snapshot_lock:
+        if _snapshot is None or not _snapshot.is_current(version):
+            body = json.dumps(build_vocabulary(), cls=JSONEncoder).encode()
+            _snapshot = VocabularySnapshot(version, body)
+        return _snapshot
+
+
+def invalidate_vocabulary():
+    global _snapshot
+    _snapshot = None
+    cache.set(VOCABULARY_VERSION_KEY, uuid.uuid4().hex, None)
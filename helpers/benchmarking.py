@@ -0,0 +1,55 @@
+import statistics
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection
+
+
+@contextmanager
+def isolated_database(verbosity: int = 0):
+    """
+    Run the enclosed block against a freshly migrated test database,
+    the same way the test runner does, and drop it afterwards.
+    """
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+class LatencyEmailBackend(BaseEmailBackend):
+    """
+    Email backend that drops messages after sleeping for
+    settings.EMAIL_LATENCY_SECONDS, standing in for a remote SMTP server.
+    """
+
+    def send_messages(self, email_messages):
+        time.sleep(getattr(settings, "EMAIL_LATENCY_SECONDS", 0.05))
+        return len(email_messages)
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize_latencies(latencies: list, elapsed: float) -> dict:
+    """
+    Latency percentiles in milliseconds and throughput in requests per second.
+    """
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "throughput": len(ordered) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+    }
@@ -8,8 +8,53 @@ PRODUCT_QTY_DEFAULT = 1
 
 TOKEN_EXPIRY_HOURS = 10
 
+TOKEN_SWEEP_BATCH_SIZE = 1000
+
+LOW_STOCK_THRESHOLD = 10
+
+PROMO_CODE_CACHE_SECONDS = 300
+
+PROMO_CODE_BATCH_SIZE = 5000
+
+REPORT_PAGE_SIZE = 50
+
+PRODUCT_PAGE_SIZE = 50
+
+PRODUCT_REVIEW_PAGE_SIZE = 20
+
+REVIEW_BATCH_SIZE = 500
+
+PRODUCT_BULK_UPDATE_MAX = 1000
+
+PRODUCT_BULK_UPDATE_BATCH_SIZE = 200
+
+ORDER_EVENT_PAGE_SIZE = 100
+
+# long-polling of the order change feed, see api.events
+ORDER_EVENT_MAX_WAIT_SECONDS = 30
+
+ORDER_EVENT_POLL_SECONDS = 0.25
+
+ORDER_EVENT_DB_POLL_SECONDS = 2
+
+# events are handed out once they are this old, ids of concurrent
+# transactions can commit out of order and a cursor must not skip one
+ORDER_EVENT_SETTLE_SECONDS = 1
+
+# server-sent event streams of the order events
+ORDER_EVENT_STREAM_HEARTBEAT_SECONDS = 15
+
+ORDER_EVENT_STREAM_RETRY_MILLISECONDS = 3000
+
 ITEM_TAX_DEFAULT = 0
 
+# longest a process serves its vocabulary snapshot without rebuilding it, in
+# case the change was recorded in a cache the process doesn't share
+VOCABULARY_SNAPSHOT_SECONDS = 60
+
+# saves of a new order, each with a new number when the last one was taken
+ORDER_NUMBER_ATTEMPTS = 3
+
 RESET_PASSWORD_STATUS_DEFAULT = "new"
 
 SHIPPING_COST_DEFAULT = 0.00
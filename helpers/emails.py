@@ -0,0 +1,31 @@
+from django.core.mail import EmailMessage
+from helpers.system_variables import SENDER_EMAIL
+
+
+def registration_confirmation_email(colleague, confirmation_code: str) -> EmailMessage:
+    email_body = f"""
+        Hi {colleague.first_name},
+        Complete your registration with this one-time security code:
+        {confirmation_code}
+        
+        Ignore this message if you have not registered with us.
+
+        Thank you,
+        Verbs Team.
+    """
+
+    return EmailMessage(
+        subject="Confirm your registration",
+        body=email_body,
+        from_email=SENDER_EMAIL,
+        to=[colleague.email],
+    )
+
+
+def reset_password_email(token: str) -> EmailMessage:
+    return EmailMessage(
+        subject="Password reset link",
+        body=f"Follow the link to reset your password http://localhost:8000/reset?token={token}. Token expires after 1 hour.",
+        from_email="oforimensahebenezer07@gmail.com",
+        to=["quameophory@yahoo.com"],
+    )
@@ -1,5 +1,9 @@
+import os
 import uuid
 import random
+import secrets
+import threading
+import time
 from helpers.defaults import ITEM_TAX_DEFAULT
 from helpers.system_variables import TAXES
 
@@ -9,8 +13,7 @@ def generate_registration_code(code_length: int = 5) -> str:
 
 
 def generate_order_number() -> str:
-    order_number = str(uuid.uuid4()).split("-")[-1]
-    return order_number
+    return _order_numbers()
 
 
 def generate_order_taxes(items_cost: float, tax_percentage: dict = TAXES) -> dict:
@@ -30,3 +33,129 @@ def generate_shipping_cost() -> float:
     this function returns the evaluated price of an order
     """
     return 0
+
+
+# Crockford's base32, without the easily confused I, L, O and U
+PROMO_CODE_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def encode_base32(number: int, width: int = 1) -> str:
+    digits = []
+    while number or len(digits) < width:
+        number, digit = divmod(number, 32)
+        digits.append(PROMO_CODE_ALPHABET[digit])
+    return "".join(reversed(digits))
+
+
+def decode_base32(digits: str) -> int:
+    number = 0
+    for digit in digits:
+        number = number * 32 + PROMO_CODE_ALPHABET.index(digit)
+    return number
+
+
+PROMO_CODE_RANDOM_LENGTH = 6
+
+
+def generate_promo_codes(
+    prefix: str, start: int, count: int, random_length: int = PROMO_CODE_RANDOM_LENGTH
+):
+    """
+    Promo codes `start` to `start + count` of a campaign.
+
+    Each code is the prefix, the code's index and `random_length` random
+    characters. Codes of the same length share the index length, so they
+    differ wherever their indexes do, and no two codes of a prefix can
+    collide. The random part keeps them from being guessed.
+    """
+    for index in range(start, start + count):
+        suffix = encode_base32(secrets.randbits(5 * random_length), random_length)
+        yield f"{prefix}-{encode_base32(index)}{suffix}"
+
+
+# order numbers pack the milliseconds since ORDER_NUMBER_EPOCH_MS, a shard id
+# and a per millisecond sequence into 59 bits, written as 12 base32 characters,
+# followed by 50 random bits. the order endpoints are looked up by number, so
+# the random part keeps numbers from being guessed from one another
+ORDER_NUMBER_EPOCH_MS = 1704067200000  # 2024-01-01 UTC, lasts until 2093
+ORDER_NUMBER_SHARD_BITS = 8
+ORDER_NUMBER_SEQUENCE_BITS = 10
+ORDER_NUMBER_RANDOM_LENGTH = 10
+ORDER_NUMBER_LENGTH = 12 + ORDER_NUMBER_RANDOM_LENGTH
+
+
+class OrderNumberGenerator:
+    """
+    Time ordered order numbers, never repeated by one generator and unique
+    across generators on different shards. Numbers sort like the moments they were made at, so new orders
+    are appended to the end of the order_number index instead of splitting
+    pages all over it.
+
+    Up to 1024 numbers are made per millisecond and shard. Past that, and
+    when the clock goes back, the sequence borrows the following
+    millisecond instead of waiting for it.
+    """
+
+    def __init__(self, shard: int):
+        if not 0 <= shard < 2**ORDER_NUMBER_SHARD_BITS:
+            raise ValueError(
+                f"Order number shard must be below {2**ORDER_NUMBER_SHARD_BITS}"
+            )
+        self.shard = shard
+        self.lock = threading.Lock()
+        self.last_ms = -1
+        self.sequence = 0
+
+    def __call__(self) -> str:
+        with self.lock:
+            now_ms = max(
+                time.time_ns() // 1_000_000 - ORDER_NUMBER_EPOCH_MS, self.last_ms
+            )
+            if now_ms == self.last_ms:
+                self.sequence = (self.sequence + 1) % 2**ORDER_NUMBER_SEQUENCE_BITS
+                if self.sequence == 0:
+                    now_ms += 1
+            else:
+                self.sequence = 0
+            self.last_ms = now_ms
+            number = (
+                now_ms << ORDER_NUMBER_SHARD_BITS | self.shard
+            ) << ORDER_NUMBER_SEQUENCE_BITS | self.sequence
+        return encode_base32(number, 12) + encode_base32(
+            secrets.randbits(5 * ORDER_NUMBER_RANDOM_LENGTH), ORDER_NUMBER_RANDOM_LENGTH
+        )
+
+
+class _OrderNumbers:
+    """
+    The order number generator of this process, on settings.ORDER_NUMBER_SHARD
+    when it is set and on a random shard otherwise. Processes on the same
+    shard only make the same number when they also draw the same random
+    part, and a taken number is replaced when the order is saved, see
+    api.serializers.OrderSerializer.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.generator = None
+
+    def __call__(self) -> str:
+        if self.generator is None:
+            with self.lock:
+                if self.generator is None:
+                    from django.conf import settings
+
+                    shard = getattr(settings, "ORDER_NUMBER_SHARD", None)
+                    if shard is None:
+                        shard = secrets.randbelow(2**ORDER_NUMBER_SHARD_BITS)
+                    self.generator = OrderNumberGenerator(shard)
+        return self.generator()
+
+
+_order_numbers = _OrderNumbers()
+
+# forked workers would otherwise share the shard and sequence of the parent
+os.register_at_fork(after_in_child=_order_numbers.reset)
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+def hasher_param(algorithm: str, name: str, default):
+    """
+    Look up a tuned hasher parameter in settings.PASSWORD_HASHER_PARAMS,
+    falling back to Django's default for that hasher.
+    """
+    params = getattr(settings, "PASSWORD_HASHER_PARAMS", {}).get(algorithm, {})
+    return params.get(name, default)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    scrypt with parameters taken from settings. The algorithm name is kept
+    so hashes made with other parameters still verify and are rehashed on
+    the next successful login.
+    """
+
+    @property
+    def work_factor(self):
+        return hasher_param("scrypt", "work_factor", ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return hasher_param("scrypt", "block_size", ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return hasher_param("scrypt", "parallelism", ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        return hasher_param("scrypt", "maxmem", ScryptPasswordHasher.maxmem)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    argon2 with parameters taken from settings. Requires argon2-cffi.
+    """
+
+    @property
+    def time_cost(self):
+        return hasher_param("argon2", "time_cost", Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return hasher_param("argon2", "memory_cost", Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return hasher_param("argon2", "parallelism", Argon2PasswordHasher.parallelism)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return hasher_param("pbkdf2_sha256", "iterations", PBKDF2PasswordHasher.iterations)
+
@@ -124,6 +124,37 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+# the selected profile hashes new passwords. the other hashers only verify
+# existing hashes, which are rehashed with the profile on the next login.
+# compare candidates with `python manage.py benchmark_hashers`.
+
+PASSWORD_HASHING_PROFILES = {
+    "scrypt": "helpers.hashers.TunedScryptPasswordHasher",
+    # requires argon2-cffi
+    "argon2": "helpers.hashers.TunedArgon2PasswordHasher",
+    "pbkdf2": "helpers.hashers.TunedPBKDF2PasswordHasher",
+}
+
+PASSWORD_HASHING_PROFILE = config("PASSWORD_HASHING_PROFILE", default="scrypt")
+
+PASSWORD_HASHER_PARAMS = {
+    # ~16MiB and 5 lanes, Django's default and the OWASP minimum for N=2**14.
+    # lower settings would rehash stronger hashes down on login
+    "scrypt": {"work_factor": 2**14, "block_size": 8, "parallelism": 5},
+    # memory_cost is in KiB
+    "argon2": {"time_cost": 2, "memory_cost": 65536, "parallelism": 1},
+    "pbkdf2_sha256": {"iterations": 870000},
+}
+
+PASSWORD_HASHERS = [PASSWORD_HASHING_PROFILES[PASSWORD_HASHING_PROFILE]] + [
+    hasher
+    for profile, hasher in PASSWORD_HASHING_PROFILES.items()
+    if profile != PASSWORD_HASHING_PROFILE
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -149,11 +180,79 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
         "oauth2_provider.contrib.rest_framework.OAuth2Authentication",
         "drf_social_oauth2.authentication.SocialAuthentication",
     ),
     # "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"]
+    # rate limits of the auth endpoints, see api.throttling.
+    # keys are "<throttle_scope>_ip" and "<throttle_scope>_email"
+    "DEFAULT_THROTTLE_RATES": {
+        "register_ip": config("THROTTLE_REGISTER_IP", default="20/hour"),
+        "register_email": config("THROTTLE_REGISTER_EMAIL", default="5/hour"),
+        "confirm_registration_ip": config(
+            "THROTTLE_CONFIRM_REGISTRATION_IP", default="30/hour"
+        ),
+        "confirm_registration_email": config(
+            "THROTTLE_CONFIRM_REGISTRATION_EMAIL", default="10/hour"
+        ),
+        "reset_password_ip": config("THROTTLE_RESET_PASSWORD_IP", default="20/hour"),
+        "reset_password_email": config(
+            "THROTTLE_RESET_PASSWORD_EMAIL", default="5/hour"
+        ),
+        "login_ip": config("THROTTLE_LOGIN_IP", default="60/min"),
+        "login_email": config("THROTTLE_LOGIN_EMAIL", default="10/min"),
+    },
+}
+
+# how long the staff reports under /api/reports/ are cached per parameter set
+REPORT_CACHE_SECONDS = config("REPORT_CACHE_SECONDS", default=300, cast=int)
+
+# order event streams are closed after this many seconds, browsers reconnect
+# on their own and resume from the last event id
+ORDER_EVENT_STREAM_MAX_SECONDS = config(
+    "ORDER_EVENT_STREAM_MAX_SECONDS", default=300, cast=int
+)
+
+# how long api.authentication keeps a colleague row in each process
+JWT_USER_CACHE_TTL_SECONDS = config("JWT_USER_CACHE_TTL_SECONDS", default=60, cast=int)
+
+# run api.sweepers in a background thread of every process every N seconds.
+# 0 disables it, use the sweep_expired_tokens command from cron instead.
+TOKEN_SWEEP_INTERVAL_SECONDS = config("TOKEN_SWEEP_INTERVAL_SECONDS", default=0, cast=int)
+
+# shard of the order numbers made by this process (0-255), see
+# helpers.generators. unset, every process picks a random one. the random
+# part of the numbers keeps processes on the same shard from clashing
+ORDER_NUMBER_SHARD = config(
+    "ORDER_NUMBER_SHARD", default="", cast=lambda value: int(value) if value else None
+)
+
+# how long clients may reuse /api/vocabulary/ before revalidating its ETag
+VOCABULARY_MAX_AGE_SECONDS = config(
+    "VOCABULARY_MAX_AGE_SECONDS", default=24 * 3600, cast=int
+)
+
+# submitted product reviews are saved in batches by a background thread of
+# every process at least every N seconds, see api.reviews.ReviewWriter.
+# 0 saves each review in its request instead.
+REVIEW_BATCH_INTERVAL_SECONDS = config(
+    "REVIEW_BATCH_INTERVAL_SECONDS", default=1, cast=float
+)
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# the throttle counters live in the default cache. use a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) in production so that
+# budgets are enforced across all worker processes.
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
 }
 
 AUTHENTICATION_BACKENDS = (